@@ -7,23 +7,89 @@ AIP, 2014].
 I. Buchinskiy, M. Kotov, A. Treier, 2022
 """
 
+import instrumentation
+import log_domain
+import time
+from collections import OrderedDict
 import tropical_algebra as ta
-from matrix_utils import calc_min, calc_max, calc_triple_product
+import tropical_scaled
+from log_domain import DualMatrix
+from matrix_utils import calc_min, calc_max, calc_triple_product, triple_product_view, RepetitionIndex
+from periodicity import predict_periodicity
+from power_store import PowerStore
 
 
-def find_t_coeff(A, B):
+class BudgetExceeded(Exception):
     """
-    Returns max(A / B) if this number is an integer, infty otherwise.
+    Raised by the attack when its Budget is exhausted.
+    """
+
+
+class Budget:
+    """
+    A limit on the work of the attack on one instance: the wall-clock time in seconds and/or the number of
+    matrix products, None means no limit. The clock starts when the budget is created.
+    The budget is checked between the steps of the search, so a step which has started is finished.
+    """
+
+    def __init__(self, seconds=None, products=None):
+        self.deadline = None if seconds is None else time.monotonic() + seconds
+        self.max_products = products
+        self.products = 0
+
+    def spend(self, products=1):
+        self.products += products
+
+    def check(self):
+        """
+        Raises BudgetExceeded if the budget is exhausted.
+        """
+        if self.max_products is not None and self.products >= self.max_products:
+            raise BudgetExceeded("%d matrix products" % self.products)
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise BudgetExceeded("deadline")
+
+
+def _is_large(A):
+    """
+    Returns True iff the entries of A are long enough for the screening on logarithms to pay off.
+    The length of an entry of a ScaledMatrix is estimated without multiplying it out.
+    """
+    if isinstance(A, tropical_scaled.ScaledMatrix):
+        a = A.primitive[0][0]
+        return a != ta.INFTY and a != 0 and a.bit_length() + A.scalar.bit_length() > log_domain.SCREEN_BITS
+    a = A[0][0]
+    return a != ta.INFTY and a.bit_length() > log_domain.SCREEN_BITS
+
+
+def _min_exceeds(A, bound):
+    """
+    Returns True iff all finite entries of A are greater than bound.
+    """
+    m = calc_min(A)
+    return m == ta.INFTY or m > bound
+
+
+def find_t_coeff(A, B, scale=1):
+    """
+    Returns max(A / (scale B)) if this number is an integer, infty otherwise.
     This function doesn't use float-point arithmetic, so instead of comparing a/b vs c/d, we compare ad vs cb.
+    The positive scale doesn't change where the maximum is, so B can be the primitive part of a ScaledMatrix.
+    For long integers the maximum is screened on logarithms first, see log_domain.find_t_coeff.
     """
-    n = len(A)
+    if _is_large(B):
+        result = log_domain.find_t_coeff(A, B, scale)
+        if result is not None:
+            return result
+
     a = A[0][0]
     b = B[0][0]
-    for i in range(n):
-        for j in range(n):
-            if A[i][j] * b >= B[i][j] * a:
-                a = A[i][j]
-                b = B[i][j]
+    for row_a, row_b in zip(A, B):
+        for x, y in zip(row_a, row_b):
+            if x * b >= y * a:
+                a = x
+                b = y
+    b *= scale
     if a % b == 0:
         return a // b
     return ta.INFTY
@@ -34,124 +100,477 @@ def is_matrix_div_matrix_const(A, B):
     If A / B is a const, then returns this const. Returns None otherwise.
     This function doesn't use float-point arithmetic, so instead of comparing a/b vs c/d, we compare ad vs cb and return a pair of numbers.
     """
-    n = len(A)
+    pairs = [(a, b) for row_a, row_b in zip(A, B) for a, b in zip(row_a, row_b)]
     ra = None
     rb = None
-    ok = False
     # Find a pair of non-zero finite elements of matrices, to compute a const.
-    for i in range(n):
-        for j in range(n):
-            if A[i][j] != 0 and A[i][j] != ta.INFTY and B[i][j] != 0 and B[i][j] != ta.INFTY:
-                ra = A[i][j]
-                rb = B[i][j]
-                ok = True
-                break
-        if ok:
+    for a, b in pairs:
+        if a != 0 and a != ta.INFTY and b != 0 and b != ta.INFTY:
+            ra = a
+            rb = b
             break
 
     if not ra or not rb:
         return None
 
     # Skip pairs 0 and 0, infty and infty.
-    for i in range(n):
-        for j in range(n):
-            if A[i][j] == 0 and B[i][j] == 0:
-                continue
-            if A[i][j] == ta.INFTY and B[i][j] == ta.INFTY:
-                continue
-            if A[i][j] == ta.INFTY or B[i][j] == ta.INFTY:
-                return None
+    for a, b in pairs:
+        if a == 0 and b == 0:
+            continue
+        if a == ta.INFTY and b == ta.INFTY:
+            continue
+        if a == ta.INFTY or b == ta.INFTY:
+            return None
 
-            if A[i][j] * rb != B[i][j] * ra:
-                return None
+        if a * rb != b * ra:
+            return None
 
     return ra, rb
 
 
-def is_matrix_repeated(As):
+def _max_exponent(base, start, limit):
     """
-    Returns True iff the last matrix is const * As[i] for some i < len(As) - 1.
+    Returns the largest k >= 0 such that start * base^k <= limit, or -1 if start > limit.
+    The base must be greater than 1. Exact integer arithmetic is used, so the result is never off by one.
     """
-    for i in range(len(As) - 1):
-        if is_matrix_div_matrix_const(As[-1], As[i]):
-            return True
+    if start > limit:
+        return -1
+    k = 0
+    x = start * base
+    while x <= limit:
+        k += 1
+        x *= base
+    return k
 
-    return False
 
+def _is_positive(A):
+    return all(a != ta.INFTY and a >= 1 for row in A for a in row)
 
-def find_polys(n, M, N, X, A, p_bound, t_bound):
+
+def degree_bounds(M, N, X, A):
     """
-    Given the public matrices M, N, X, Alice's matrix A. Returns p' and t'.
+    Returns a pair (i_max, j_max): the rows i > i_max and the columns j > j_max of the search in find_polys
+    are always pruned, None means no bound. For matrices with entries >= 1 every entry of M^i * X is at least
+    min(M)^i * min(X) and every entry of M^i * X * N^j is at least min(X) * min(N)^j, so these numbers are
+    compared with min(A) and max(A) like calc_min(MiX) and calc_min(MiXNj) are. The bounds are -1 if even
+    the first row (column) is pruned.
     """
-    minA = calc_min(A)
-    maxA = calc_max(A)
-
-    p = [1]
+    if not (_is_positive(M) and _is_positive(N) and _is_positive(X) and _is_positive(A)):
+        return None, None
+    minX = calc_min(X)
+    minM = calc_min(M)
+    minN = calc_min(N)
+    i_max = _max_exponent(minM, minX, calc_min(A)) if minM > 1 else None
+    j_max = _max_exponent(minN, minX, calc_max(A)) if minN > 1 else None
+    return i_max, j_max
 
-    Mi = [ta.one_matrix_max_times(n)]
-    Nj = [ta.one_matrix_min_times(n)]
-    Npd = None
 
-    for i in range(p_bound + 1):
-        if is_matrix_repeated(Mi):
-            return None, None
-
-        MiX = ta.mul_matrices_max_times(Mi[-1], X)
-        minMiX = calc_min(MiX)
-
-        if minMiX > minA:
-            return None, None
-
-        t = []
-        tN = ta.zero_matrix_min_times(n)
+def clamp_bounds(M, N, X, A, p_bound, t_bound):
+    """
+    Returns p_bound and t_bound clamped by degree_bounds (but not below 0).
+    The search with the clamped bounds gives the same result as with the given ones.
+    """
+    return _clamp(degree_bounds(M, N, X, A), p_bound, t_bound)
 
-        for j in range(t_bound + 1):
-            if Npd:
-                if j == Npd:
-                    break
-            else:
-                if is_matrix_repeated(Nj):
-                    Npd = j
-                    break
 
-            if calc_min(ta.mul_matrices_min_times(MiX, Nj[j])) > maxA:
-                break
+def _clamp(bounds, p_bound, t_bound):
+    i_max, j_max = bounds
+    if i_max is not None:
+        p_bound = min(p_bound, max(i_max, 0))
+    if j_max is not None:
+        t_bound = min(t_bound, max(j_max, 0))
+    return p_bound, t_bound
 
-            t.insert(0, find_t_coeff(A, ta.mul_matrices_min_times(MiX, Nj[j])))
-            tN = ta.sum_matrices_min_times(
-                tN, ta.mul_matrix_by_coef_min_times(Nj[j], t[0]))
 
-            if ta.mul_matrices_min_times(MiX, tN) == A:
-                return p, t
+def search_space_report(M, N, X, A, p_bound, t_bound):
+    """
+    Returns a dict with the nominal and the clamped bounds and the numbers of pairs (i, j) in the search
+    space of find_polys before and after clamping.
+    """
+    p_clamped, t_clamped = clamp_bounds(M, N, X, A, p_bound, t_bound)
+    nominal = (p_bound + 1) * (t_bound + 1)
+    clamped = (p_clamped + 1) * (t_clamped + 1)
+    return {
+        "p_bound": p_bound,
+        "t_bound": t_bound,
+        "p_clamped": p_clamped,
+        "t_clamped": t_clamped,
+        "nominal_steps": nominal,
+        "clamped_steps": clamped,
+        "removed": 1 - clamped / nominal,
+    }
+
+
+class _Row:
+    """
+    The state of the search for t' for one power M^i: MiX = M^i * X, the coefficients t found so far,
+    MiXtN = MiX * t(N) and the next j to check. closed is True if the row was pruned, then larger bounds
+    can't change it. If the matrices of the row are moved to the row store of PolySearch, MiX and MiXtN are None
+    and MiX_index and MiXtN_index are their indices there. MiX never changes, so it is stored once.
+    """
 
-            if len(Nj) == j + 1 and j < t_bound:
-                Nj.append(ta.mul_matrices_min_times(Nj[-1], N))
+    def __init__(self, MiX, n):
+        self.MiX = MiX
+        self.t = []
+        # A TropicalMatrix, so the check MiXtN == A compares two flat tuples.
+        self.MiXtN = ta.TropicalMatrix(ta.zero_matrix_min_times(n))
+        self.j = 0
+        self.closed = False
+        self.found = False
+        self.MiX_index = None
+        self.MiXtN_index = None
+
+    def close(self):
+        """
+        Marks the row as pruned and frees its matrices, a pruned row is never continued.
+        """
+        self.closed = True
+        self.MiX = None
+        self.MiXtN = None
+
+
+class PolySearch:
+    """
+    The state of find_polys for the public matrices M, N, X and Alice's matrix A.
+    run can be called again with larger bounds, then the search is resumed instead of starting from scratch:
+    the powers of N and the fingerprints of the powers of M are reused, rows which were stopped by t_bound are
+    continued, and new rows are started after the last one. The result is the same as a new search would return.
+    The state can be pickled to resume the search later or in another process.
+    The bounds are clamped by degree_bounds, which doesn't change the result.
+    If window is given, the powers of M and N are kept in power_store.PowerStore files with only the last window
+    powers in memory, and the repetition checks keep hashes instead of fingerprints. The rows stopped by t_bound
+    move their matrices to such a file as well, and only the logarithms of the last window powers are cached,
+    so the number of matrices in memory doesn't grow with the bounds.
+    """
 
-        p.append(0)
+    def __init__(self, n, M, N, X, A, predict=False, window=None):
+        self.n = n
+        self.M = M
+        self.N = N
+        self.X = X
+        self.A = ta.TropicalMatrix(A)
+        self.predict = predict
+        self.window = window
+        self.minA = calc_min(A)
+        self.maxA = calc_max(A)
+        self.degree_bounds = degree_bounds(M, N, X, A)
+        self.p_bound = -1
+        self.t_bound = -1
+
+        # Only the last power of M is kept, earlier ones are represented by their fingerprints.
+        # Powers and MiX are ScaledMatrix, the common factors of their entries are kept apart.
+        self.M_scaled = tropical_scaled.MAX_TIMES.scaled(M)
+        self.N_scaled = tropical_scaled.MIN_TIMES.scaled(N)
+        self.X_scaled = tropical_scaled.MAX_TIMES.scaled(X)
+        self.Mi = None
+        if window is None:
+            self.Mi_store = None
+            self.Mi_index = RepetitionIndex()
+            self.Nj = [tropical_scaled.MIN_TIMES.one_matrix(n)]
+            self.Nj_index = RepetitionIndex()
+            self.row_store = None
+        else:
+            self.Mi_store = PowerStore(window)
+            self.Mi_index = RepetitionIndex(self.Mi_store)
+            self.Nj = PowerStore(window, [tropical_scaled.MIN_TIMES.one_matrix(n)])
+            self.Nj_index = RepetitionIndex(self.Nj)
+            self.row_store = PowerStore(window)
+        self.Mpd = None
+        self.Npd = None
+        self.rows = []
+        # True if the search can't go beyond the last row for any bounds.
+        self.stopped = False
+        self._duals = OrderedDict()
+        self._budget = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_duals"] = OrderedDict()
+        state["_budget"] = None
+        return state
+
+    def can_resume(self, p_bound, t_bound):
+        """
+        Returns True iff run can be called with these bounds, i.e. they are not less than the previous ones.
+        """
+        return p_bound >= self.p_bound and t_bound >= self.t_bound
+
+    def run(self, p_bound, t_bound, budget=None):
+        """
+        Returns p' and t' searched with the given bounds, or None, None.
+        Raises BudgetExceeded if the budget is exhausted, then the search can be resumed by calling run again.
+        """
+        if not self.can_resume(p_bound, t_bound):
+            raise ValueError("the bounds are less than the bounds of the previous run")
+        self._budget = budget
+        try:
+            return self._run(p_bound, t_bound)
+        finally:
+            self._budget = None
+
+    def _run(self, p_bound, t_bound):
+        first_run = self.p_bound < 0
+        self.p_bound = p_bound
+        self.t_bound = t_bound
+        nominal_steps = (p_bound + 1) * (t_bound + 1)
+        p_bound, t_bound = _clamp(self.degree_bounds, p_bound, t_bound)
+        if first_run:
+            instrumentation.count("nominal_steps", nominal_steps)
+            instrumentation.count("clamped_steps", (p_bound + 1) * (t_bound + 1))
+
+        if first_run and self.predict:
+            with instrumentation.phase("predict"):
+                M_period = predict_periodicity(self.M, ta.MAX_TIMES, p_bound)
+                N_period = predict_periodicity(self.N, ta.MIN_TIMES, t_bound)
+            if M_period:
+                self.Mpd = sum(M_period)
+            if N_period:
+                self.Npd = sum(N_period)
+
+        for i, row in enumerate(self.rows):
+            if row.closed:
+                continue
+            if row.found or self._search_row(row, t_bound):
+                return [1] + [0] * i, list(row.t)
 
-        if i < p_bound:
-            Mi.append(ta.mul_matrices_max_times(Mi[-1], M))
+        if self.stopped:
+            return None, None
 
-    return None, None
+        for i in range(len(self.rows), p_bound + 1):
+            self._check_budget()
+            if i == 0:
+                self.Mi = tropical_scaled.MAX_TIMES.one_matrix(self.n)
+            else:
+                with instrumentation.phase("powers"):
+                    self.Mi = tropical_scaled.MAX_TIMES.mul_matrices(self.Mi, self.M_scaled)
+                self._spend()
+
+            row = self._start_row(i)
+            if row is None:
+                self.stopped = True
+                return None, None
+            self.rows.append(row)
+            if self._search_row(row, t_bound):
+                return [1] + [0] * i, list(row.t)
+
+        return None, None
+
+    def _start_row(self, i):
+        """
+        Returns the row of Mi = M^i, or None if the search is over.
+        """
+        Mi = self.Mi
+        if self.Mpd is not None:
+            if i == self.Mpd:
+                return None
+        else:
+            with instrumentation.phase("repetition"):
+                if self.Mi_store is not None:
+                    self.Mi_store.append(Mi)
+                if self.Mi_index.add(Mi):
+                    return None
+
+        if _is_large(Mi):
+            with instrumentation.phase("screen"):
+                if log_domain.min_product_exceeds(DualMatrix(Mi), self._dual("X", self.X), self.minA,
+                                                   ta.MAX_TIMES):
+                    return None
+
+        self._spend()
+        with instrumentation.phase("products"):
+            MiX = tropical_scaled.MAX_TIMES.mul_matrices(Mi, self.X_scaled)
+            # min(c P) > minA iff min(P) > minA // c for integers.
+            if _min_exceeds(MiX.primitive, self.minA // MiX.scalar):
+                return None
+        return _Row(MiX, self.n)
+
+    def _power_of_N(self, j):
+        while len(self.Nj) <= j:
+            with instrumentation.phase("powers"):
+                self.Nj.append(tropical_scaled.MIN_TIMES.mul_matrices(self.Nj[-1], self.N_scaled))
+            self._spend()
+        return self.Nj[j]
+
+    def _spend(self):
+        if self._budget is not None:
+            self._budget.spend()
+
+    def _check_budget(self):
+        if self._budget is not None:
+            self._budget.check()
+
+    def _dual(self, key, A):
+        """
+        Returns the logarithms of the matrix A as a DualMatrix, they are cached by key: "X" or ("N", j).
+        Only the logarithms are kept, as A may be a copy read from a PowerStore, and only the last window of them
+        if window is given.
+        """
+        dual = self._duals.get(key)
+        if dual is None:
+            dual = self._duals[key] = DualMatrix(log=log_domain.to_log(A))
+            if self.window is not None and len(self._duals) > self.window:
+                self._duals.popitem(last=False)
+        else:
+            self._duals.move_to_end(key)
+        return dual
+
+    def _spill(self, row):
+        """
+        Moves the matrices of the row to the row store.
+        """
+        if row.MiX_index is None:
+            row.MiX_index = len(self.row_store)
+            self.row_store.append(row.MiX)
+        row.MiXtN_index = len(self.row_store)
+        self.row_store.append(row.MiXtN)
+        row.MiX = None
+        row.MiXtN = None
+        if len(self.row_store) > 2 * len(self.rows):
+            self._compact_rows()
+
+    def _compact_rows(self):
+        """
+        Replaces the row store by a new one with only the matrices of the open rows, the store is append-only,
+        so the old MiXtN of the continued rows and the matrices of the closed rows are left in it.
+        """
+        store = PowerStore(self.window)
+        for row in self.rows:
+            if row.closed or row.MiX_index is None:
+                row.MiX_index = row.MiXtN_index = None
+                continue
+            MiX = row.MiX if row.MiX is not None else self.row_store[row.MiX_index]
+            row.MiX_index = len(store)
+            store.append(MiX)
+            if row.MiX is None:
+                MiXtN = self.row_store[row.MiXtN_index]
+                row.MiXtN_index = len(store)
+                store.append(MiXtN)
+            else:
+                # The row is in memory, its MiXtN is stored when the row is stopped again.
+                row.MiXtN_index = None
+        self.row_store.close()
+        self.row_store = store
+
+    def _search_row(self, row, t_bound):
+        """
+        Continues the search in the row up to t_bound. Returns True iff t' is found.
+        """
+        if row.MiX is None:
+            row.MiX = self.row_store[row.MiX_index]
+            row.MiXtN = ta.TropicalMatrix(self.row_store[row.MiXtN_index])
+        MiX = row.MiX
+        MiX_dual = DualMatrix(MiX)
+        A = self.A
+        for j in range(row.j, t_bound + 1):
+            # The row is consistent here, so the search can be resumed if the budget is exhausted.
+            row.j = j
+            self._check_budget()
+
+            if self.Npd:
+                if j == self.Npd:
+                    row.close()
+                    return False
+            elif j == len(self.Nj_index):
+                # Nj is checked once, when it is reached for the first time.
+                with instrumentation.phase("repetition"):
+                    if self.Nj_index.add(self._power_of_N(j)):
+                        self.Npd = j
+                        row.close()
+                        return False
+
+            Nj = self._power_of_N(j)
+            if _is_large(MiX) or _is_large(Nj):
+                with instrumentation.phase("screen"):
+                    if log_domain.min_product_exceeds(MiX_dual, self._dual(("N", j), Nj), self.maxA,
+                                                       ta.MIN_TIMES):
+                        row.close()
+                        return False
+
+            self._spend()
+            with instrumentation.phase("products"):
+                c = MiX.scalar * Nj.scalar
+                # MiX * N^j = c P, the primitive product P isn't multiplied out.
+                P = ta.MIN_TIMES.mul_matrices(MiX.primitive, Nj.primitive)
+                if _min_exceeds(P, self.maxA // c):
+                    row.close()
+                    return False
+
+            with instrumentation.phase("t_coeff"):
+                t = find_t_coeff(A, P, c)
+                row.t.insert(0, t)
+                # MiX * t(N) is maintained incrementally: MiX * (tN + t N^j) = MiX * tN + (t c) P.
+                if t != ta.INFTY:
+                    row.MiXtN = ta.MIN_TIMES.add_scaled_matrix(row.MiXtN, P, t * c)
+
+                if row.MiXtN == A:
+                    row.j = j + 1
+                    row.found = True
+                    return True
+
+        row.j = t_bound + 1
+        if self.row_store is not None:
+            self._spill(row)
+        return False
+
+
+def find_polys(n, M, N, X, A, p_bound, t_bound, predict=False, budget=None, window=None):
+    """
+    Given the public matrices M, N, X, Alice's matrix A. Returns p' and t'.
+    If predict is True, the first repeated powers of M and N are computed up front by
+    periodicity.predict_periodicity, otherwise every new power is compared with the earlier ones.
+    When the entries are long, the pruning tests are screened on logarithms, and the exact products are
+    skipped if the logarithms decide that the search is pruned.
+    See PolySearch to resume the search with larger bounds and to keep the powers on disk (window).
+    Raises BudgetExceeded if the budget is exhausted.
+    """
+    return PolySearch(n, M, N, X, A, predict, window).run(p_bound, t_bound, budget)
 
 
-def attack(M, N, X, A, B, p_bound, t_bound):
+def attack(M, N, X, A, B, p_bound, t_bound, predict=False, cache=None, budget=None, window=None):
     """
     The implementation of our attack on the protocol.
+    cache is an attack_cache.AttackCache: the outcome of an instance attacked before with the same bounds is
+    taken from it, and the searches of polynomials are resumed from the cached states.
+    Raises BudgetExceeded if the budget is exhausted before the attack is finished.
+    window is the number of powers kept in memory by find_polys, all powers are kept if it is None.
     """
+    if cache is None:
+        return _attack(M, N, X, A, B, p_bound, t_bound, predict, find_polys, budget, window)
+
+    key = cache.outcome_key(M, N, X, A, B, p_bound, t_bound, predict)
+    try:
+        return cache.get("outcome", key)
+    except KeyError:
+        pass
+    k1 = _attack(M, N, X, A, B, p_bound, t_bound, predict, cache.find_polys, budget, window)
+    cache.put("outcome", key, k1)
+    return k1
+
+
+def _attack(M, N, X, A, B, p_bound, t_bound, predict, find_polys, budget, window):
     n = len(M)
-    p1, t1 = find_polys(n, M, N, X, A, p_bound, t_bound)
+    with instrumentation.phase("find_polys"):
+        p1, t1 = find_polys(n, M, N, X, A, p_bound, t_bound, predict, budget, window)
     if p1 is None or t1 is None:
         return None
 
-    q1, r1 = find_polys(n, M, N, X, B, p_bound, t_bound)
+    with instrumentation.phase("find_polys"):
+        q1, r1 = find_polys(n, M, N, X, B, p_bound, t_bound, predict, budget, window)
     if q1 is None or r1 is None:
         return None
 
-    k1 = calc_triple_product(M, N, B, p1, t1)
-    k2 = calc_triple_product(M, N, A, q1, r1)
+    if budget is not None:
+        # The verification computes the four products of k1 and k2, they are charged before they are computed,
+        # so the attack doesn't overrun the budget after the search.
+        budget.spend(4)
+        budget.check()
+
+    with instrumentation.phase("verify"):
+        k1 = calc_triple_product(M, N, B, p1, t1)
+        # k2 is compared with k1 row by row, a wrong key is rejected without computing all of k2.
+        verified = triple_product_view(M, N, A, q1, r1).equals(k1)
 
-    if k1 == k2:
+    if verified:
         return k1
 
     return None
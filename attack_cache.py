@@ -0,0 +1,148 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from attack import PolySearch
+
+VERSION = 3
+"""The version of the cached entries, it must be increased when PolySearch or the attack change,
+so the entries stored by an older code are not used."""
+
+_KINDS = (".search", ".outcome")
+
+
+def instance_key(*values):
+    """
+    Returns a hex digest of the values (matrices, bounds and flags) which identifies an instance.
+    Matrices given as lists and as TropicalMatrix have the same key. The key depends on VERSION.
+    """
+    h = hashlib.sha256()
+    h.update(b"v" + str(VERSION).encode() + b";")
+    for value in values:
+        if isinstance(value, (bool, int)):
+            h.update(repr(value).encode())
+        else:
+            h.update(repr([list(row) for row in value]).encode())
+        h.update(b";")
+    return h.hexdigest()
+
+
+class AttackCache:
+    """
+    A cache of the states of find_polys (PolySearch) and of the outcomes of the attack keyed by instance_key.
+    If directory is None, the cache is kept in memory, otherwise every entry is pickled to a file in
+    the directory, so the cache survives between runs and can be shared by worker processes.
+    max_bytes bounds the total size of the files in the directory, the least recently used files are removed
+    first. The cache in memory isn't bounded.
+    """
+
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __getstate__(self):
+        return self.directory, self.max_bytes
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def get(self, kind, key):
+        """
+        Returns the entry of the kind ("search" or "outcome") for the key. Raises KeyError if there is no entry.
+        """
+        if self.directory is None:
+            entry = self._entries[kind, key]
+        else:
+            path = self._path(kind, key)
+            try:
+                with open(path, "rb") as f:
+                    entry = pickle.load(f)
+                if self.max_bytes is not None:
+                    # The modification time orders the files by their last use.
+                    os.utime(path)
+            except FileNotFoundError:
+                raise KeyError(key) from None
+        return entry
+
+    def put(self, kind, key, entry):
+        """
+        Stores the entry of the kind for the key. Files are replaced atomically.
+        """
+        if self.directory is None:
+            self._entries[kind, key] = entry
+            return
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(kind, key))
+        if self.max_bytes is not None:
+            self._evict()
+
+    def _evict(self):
+        """
+        Removes the least recently used files until their total size is at most max_bytes.
+        """
+        files = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(_KINDS):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+                total += stat.st_size
+        files.sort()
+        for _, path, size in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Another process has removed it.
+                pass
+            total -= size
+
+    def _path(self, kind, key):
+        return os.path.join(self.directory, key + "." + kind)
+
+    def find_polys(self, n, M, N, X, A, p_bound, t_bound, predict=False, budget=None, window=None):
+        """
+        The same as attack.find_polys, but the search resumes from the cached state if it was run before
+        with bounds not greater than the given ones. The state is cached even if the budget is exhausted.
+        window is used only for new searches, a cached state keeps its own.
+        """
+        key = instance_key(M, N, X, A, predict)
+        try:
+            search = self.get("search", key)
+        except KeyError:
+            search = None
+        if search is None or not search.can_resume(p_bound, t_bound):
+            self.misses += 1
+            search = PolySearch(n, M, N, X, A, predict, window)
+        else:
+            self.hits += 1
+        try:
+            return search.run(p_bound, t_bound, budget)
+        finally:
+            self.put("search", key, search)
+
+    def outcome_key(self, M, N, X, A, B, p_bound, t_bound, predict=False):
+        """
+        Returns the key of the outcome of attack.attack with these arguments.
+        """
+        return instance_key(M, N, X, A, B, p_bound, t_bound, predict)
@@ -10,8 +10,16 @@ I. Buchinskiy, M. Kotov, A. Treier, 2022
 import tropical_algebra as ta
 import unittest
 import attack
+import instrumentation
+import batch_attack
+import random
 import generate_instance
 import matrix_utils
+import os
+import pickle
+import tempfile
+import time
+import attack_cache
 
 
 class TestAttack(unittest.TestCase):
@@ -40,6 +48,171 @@ class TestAttack(unittest.TestCase):
 
         self.assertEqual(K, i.kA)
 
+    def test_repetition_index(self):
+        M = [[5, 7, 1], [4, 2, 3], [2, 5, 6]]
+        index = matrix_utils.RepetitionIndex()
+        self.assertFalse(index.add(M))
+        self.assertFalse(index.add(ta.mul_matrices_max_times(M, M)))
+        self.assertTrue(index.add(ta.mul_matrix_by_coef_max_times(M, 6)))
+        self.assertFalse(index.add([[0, ta.INFTY], [ta.INFTY, 0]]))
+        self.assertFalse(index.add([[0, ta.INFTY], [ta.INFTY, 0]]))
+        self.assertEqual(5, len(index))
+        self.assertEqual(matrix_utils.projective_fingerprint([[2, 0], [ta.INFTY, 4]]),
+                         matrix_utils.projective_fingerprint([[3, 0], [ta.INFTY, 6]]))
+        self.assertNotEqual(matrix_utils.projective_fingerprint([[2, 0], [ta.INFTY, 4]]),
+                            matrix_utils.projective_fingerprint([[2, 0], [4, ta.INFTY]]))
+
+    def test_attack_batch(self):
+        random.seed(1)
+        insts = [generate_instance.generate_random_instance(3, 10, 5) for _ in range(10)]
+        Ms, Ns, Xs, As, Bs = [[getattr(i, name) for i in insts] for name in "MNXAB"]
+        self.assertEqual([attack.find_polys(3, i.M, i.N, i.X, i.A, 10, 10) for i in insts],
+                         batch_attack.find_polys_batch(3, Ms, Ns, Xs, As, 10, 10))
+        self.assertEqual([attack.attack(i.M, i.N, i.X, i.A, i.B, 10, 10) for i in insts],
+                         batch_attack.attack_batch(Ms, Ns, Xs, As, Bs, 10, 10))
+
+    def test_instrumentation(self):
+        M = [[5, 7, 1], [4, 2, 3], [2, 5, 6]]
+        N = [[2, 1, 3], [7, 5, 4], [3, 1, 9]]
+        X = [[5, 2, 8], [6, 7, 4], [3, 1, 5]]
+        A = matrix_utils.calc_triple_product(M, N, X, [1, 5, 10, 0], [3, 1, ta.INFTY])
+        B = matrix_utils.calc_triple_product(M, N, X, [1, 5, 0], [10, ta.INFTY, 1, ta.INFTY, ta.INFTY])
+        self.assertFalse(instrumentation.enabled())
+        with instrumentation.collect() as stats:
+            attack.attack(M, N, X, A, B, 100, 100)
+        self.assertFalse(instrumentation.enabled())
+        self.assertGreater(stats.counters["matrix_products"], 0)
+        self.assertGreaterEqual(stats.counters["element_ops"], 2 * 27 * stats.counters["matrix_products"])
+        for name in ["find_polys", "products", "t_coeff", "verify"]:
+            self.assertIn(name, stats.timers)
+
+    def test_resume_search(self):
+        random.seed(2)
+        for k in range(20):
+            i = generate_instance.generate_random_instance(3, 10, 8)
+            for bounds in [(1, 1, 20, 20), (3, 0, 3, 10), (0, 5, 10, 5)]:
+                search = attack.PolySearch(3, i.M, i.N, i.X, i.A, k % 2 == 0)
+                search.run(bounds[0], bounds[1])
+                search = pickle.loads(pickle.dumps(search))
+                self.assertEqual(search.run(bounds[2], bounds[3]),
+                                 attack.find_polys(3, i.M, i.N, i.X, i.A, bounds[2], bounds[3], k % 2 == 0))
+                self.assertRaises(ValueError, search.run, 0, 0)
+
+    def test_power_window(self):
+        random.seed(6)
+        for k in range(10):
+            i = generate_instance.generate_random_instance(3, 10, 8)
+            search = attack.PolySearch(3, i.M, i.N, i.X, i.A, k % 2 == 0, window=2)
+            search.run(3, 3)
+            search = pickle.loads(pickle.dumps(search))
+            self.assertEqual(search.run(20, 20), attack.find_polys(3, i.M, i.N, i.X, i.A, 20, 20, k % 2 == 0))
+            self.assertEqual(attack.attack(i.M, i.N, i.X, i.A, i.B, 20, 20, window=1),
+                             attack.attack(i.M, i.N, i.X, i.A, i.B, 20, 20))
+
+    def test_window_memory(self):
+        random.seed(2)
+        i = generate_instance.generate_random_instance(6, 10 ** 6, 10)
+        search = attack.PolySearch(6, i.M, i.N, i.X, i.A, window=2)
+        self.assertEqual(search.run(20, 3), attack.find_polys(6, i.M, i.N, i.X, i.A, 20, 3))
+        # Only the logarithms of the last powers are cached, and the rows keep no matrices between runs.
+        self.assertEqual(len(search._duals), 2)
+        self.assertTrue(all(dual.exact is None for dual in search._duals.values()))
+        self.assertGreater(len(search.rows), 2)
+        for row in search.rows:
+            if not row.found:
+                self.assertIsNone(row.MiX)
+                self.assertIsNone(row.MiXtN)
+        self.assertEqual(search.run(40, 40), attack.find_polys(6, i.M, i.N, i.X, i.A, 40, 40))
+        self.assertLessEqual(len(search._duals), 2)
+
+    def test_row_store(self):
+        random.seed(0)
+        i = generate_instance.generate_random_instance(4, 10, 8)
+        search = attack.PolySearch(4, i.M, i.N, i.X, i.A, window=2)
+        for bound in range(7):
+            search = pickle.loads(pickle.dumps(search))
+            self.assertEqual(search.run(bound, bound), attack.find_polys(4, i.M, i.N, i.X, i.A, bound, bound))
+            # MiX is stored once per row and the stale MiXtN are dropped.
+            self.assertLessEqual(len(search.row_store), 2 * len(search.rows))
+
+    def test_attack_cache(self):
+        random.seed(3)
+        cache = attack_cache.AttackCache()
+        insts = [generate_instance.generate_random_instance(3, 10, 5) for _ in range(5)]
+        for bound in [2, 10, 10]:
+            for i in insts:
+                self.assertEqual(attack.attack(i.M, i.N, i.X, i.A, i.B, bound, bound, cache=cache),
+                                 attack.attack(i.M, i.N, i.X, i.A, i.B, bound, bound))
+        self.assertGreater(cache.hits, 0)
+        self.assertEqual(attack_cache.instance_key(ta.TropicalMatrix(insts[0].M), 1),
+                         attack_cache.instance_key(insts[0].M, 1))
+
+    def test_attack_cache_limits(self):
+        key = attack_cache.instance_key([[1]], 2)
+        version = attack_cache.VERSION
+        try:
+            attack_cache.VERSION += 1
+            self.assertNotEqual(attack_cache.instance_key([[1]], 2), key)
+        finally:
+            attack_cache.VERSION = version
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = pickle.loads(pickle.dumps(attack_cache.AttackCache(directory, max_bytes=2500)))
+            self.assertEqual(cache.max_bytes, 2500)
+            for k in range(10):
+                cache.put("outcome", str(k), list(range(k * 1000, k * 1000 + 200)))
+                # The first entry is used all the time, so it is kept.
+                cache.get("outcome", "0")
+                time.sleep(0.01)
+            files = os.listdir(directory)
+            self.assertLessEqual(sum(os.path.getsize(os.path.join(directory, f)) for f in files), 2500)
+            self.assertIn("0.outcome", files)
+            self.assertNotIn("1.outcome", files)
+            self.assertIn("9.outcome", files)
+            self.assertRaises(KeyError, cache.get, "outcome", "1")
+
+    def test_budget(self):
+        random.seed(4)
+        for _ in range(10):
+            i = generate_instance.generate_random_instance(3, 10, 8)
+            search = attack.PolySearch(3, i.M, i.N, i.X, i.A)
+            while True:
+                budget = attack.Budget(products=3)
+                try:
+                    result = search.run(15, 15, budget)
+                    break
+                except attack.BudgetExceeded:
+                    self.assertLessEqual(budget.products, 4)
+            self.assertEqual(result, attack.find_polys(3, i.M, i.N, i.X, i.A, 15, 15))
+        self.assertRaises(attack.BudgetExceeded, attack.attack, i.M, i.N, i.X, i.A, i.B, 15, 15,
+                          budget=attack.Budget(seconds=0))
+        # The verification is charged to the budget too.
+        budget = attack.Budget()
+        key = attack.attack(i.M, i.N, i.X, i.A, i.B, 15, 15, budget=budget)
+        self.assertIsNotNone(key)
+        self.assertRaises(attack.BudgetExceeded, attack.attack, i.M, i.N, i.X, i.A, i.B, 15, 15,
+                          budget=attack.Budget(products=budget.products))
+        self.assertEqual(attack.attack(i.M, i.N, i.X, i.A, i.B, 15, 15,
+                                       budget=attack.Budget(products=budget.products + 1)), key)
+
+    def test_degree_bounds(self):
+        self.assertEqual(attack._max_exponent(2, 3, 24), 3)
+        self.assertEqual(attack._max_exponent(2, 3, 23), 2)
+        self.assertEqual(attack._max_exponent(2, 3, 2), -1)
+        random.seed(5)
+        for _ in range(20):
+            M, N, X = [generate_instance.generate_random_matrix(3, 2, 10) for _ in range(3)]
+            A = matrix_utils.calc_triple_product(M, N, X, [1, 0, 3], [2, ta.INFTY, 5])
+            i_max, j_max = attack.degree_bounds(M, N, X, A)
+            MiX = ta.mul_matrices_max_times(ta.pwr_matrix_max_times(M, i_max + 1), X)
+            self.assertGreater(matrix_utils.calc_min(MiX), matrix_utils.calc_min(A))
+            XNj = ta.mul_matrices_min_times(X, ta.pwr_matrix_min_times(N, j_max + 1))
+            self.assertGreater(matrix_utils.calc_min(XNj), matrix_utils.calc_max(A))
+            report = attack.search_space_report(M, N, X, A, 50, 50)
+            self.assertEqual((report["p_clamped"], report["t_clamped"]), (i_max, j_max))
+            self.assertGreater(report["removed"], 0)
+        self.assertEqual(attack.degree_bounds([[1]], [[2]], [[0]], [[1]]), (None, None))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,167 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import instrumentation
+import tropical_algebra as ta
+import tropical_numpy as tn
+from attack import find_t_coeff
+from matrix_utils import calc_min, calc_max, calc_triple_product, triple_product_view, RepetitionIndex
+
+
+def as_matrices(stack):
+    """
+    Converts a stack of K matrices (a sequence of matrices or an array of shape (K, n, n)) to a list of matrices.
+    """
+    if hasattr(stack, "tolist"):
+        return stack.tolist()
+    return list(stack)
+
+
+def mul_matrices_batch(semiring, As, Bs):
+    """
+    Returns the list of products As[k] * Bs[k] over R_max-times or R_min-times.
+    The products are computed at once by the array backend if NumPy is installed.
+    """
+    if len(As) > 1 and tn.is_available():
+        n = len(As[0])
+        instrumentation.count("matrix_products", len(As))
+        instrumentation.count("element_ops", 2 * len(As) * n ** 3)
+        instrumentation.count("matrices_allocated", len(As))
+        if semiring is ta.MAX_TIMES:
+            return tn.mul_matrices_max_times_batch(As, Bs)
+        return tn.mul_matrices_min_times_batch(As, Bs)
+    return [semiring.mul_matrices(A, B) for A, B in zip(As, Bs)]
+
+
+class _Search:
+    """
+    The state of find_polys for one instance of a batch.
+    """
+
+    def __init__(self, n, M, N, X, A):
+        self.M = M
+        self.N = N
+        self.X = X
+        self.A = ta.TropicalMatrix(A)
+        self.minA = calc_min(A)
+        self.maxA = calc_max(A)
+        self.p = [1]
+        self.Mi = ta.one_matrix_max_times(n)
+        self.Mi_index = RepetitionIndex()
+        self.Nj = [ta.one_matrix_min_times(n)]
+        self.Nj_index = RepetitionIndex()
+        self.Npd = None
+        self.MiX = None
+        self.t = None
+        self.MiXtN = None
+        self.result = None
+        self.done = False
+
+    def finish(self, p, t):
+        self.result = (p, t)
+        self.done = True
+
+
+def find_polys_batch(n, Ms, Ns, Xs, As, p_bound, t_bound):
+    """
+    Given K instances of size n: the public matrices Ms[k], Ns[k], Xs[k] and Alice's matrices As[k].
+    Returns the list of pairs (p', t') computed by find_polys for every instance. The instances are processed
+    in lock-step, so the matrix products of one step are computed at once for all instances which are still
+    searching; instances are dropped from the batch as soon as they are finished or pruned.
+    """
+    searches = [_Search(n, M, N, X, A)
+                for M, N, X, A in zip(as_matrices(Ms), as_matrices(Ns), as_matrices(Xs), as_matrices(As))]
+
+    for i in range(p_bound + 1):
+        for s in searches:
+            if not s.done and s.Mi_index.add(s.Mi):
+                s.finish(None, None)
+
+        live = [s for s in searches if not s.done]
+        if not live:
+            break
+        for s, MiX in zip(live, mul_matrices_batch(ta.MAX_TIMES, [s.Mi for s in live], [s.X for s in live])):
+            s.MiX = MiX
+            if calc_min(MiX) > s.minA:
+                s.finish(None, None)
+            s.t = []
+            s.MiXtN = ta.TropicalMatrix(ta.zero_matrix_min_times(n))
+
+        live = [s for s in live if not s.done]
+        inner = live
+        for j in range(t_bound + 1):
+            searching = []
+            for s in inner:
+                if s.Npd:
+                    if j == s.Npd:
+                        continue
+                elif j == len(s.Nj_index):
+                    if s.Nj_index.add(s.Nj[j]):
+                        s.Npd = j
+                        continue
+                searching.append(s)
+
+            inner = []
+            products = mul_matrices_batch(ta.MIN_TIMES, [s.MiX for s in searching], [s.Nj[j] for s in searching])
+            for s, MiXNj in zip(searching, products):
+                if calc_min(MiXNj) > s.maxA:
+                    continue
+
+                s.t.insert(0, find_t_coeff(s.A, MiXNj))
+                s.MiXtN = ta.MIN_TIMES.add_scaled_matrix(s.MiXtN, MiXNj, s.t[0])
+
+                if s.MiXtN == s.A:
+                    s.finish(s.p, s.t)
+                    continue
+                inner.append(s)
+
+            growing = [s for s in inner if len(s.Nj) == j + 1 and j < t_bound]
+            for s, Nj in zip(growing, mul_matrices_batch(ta.MIN_TIMES, [s.Nj[-1] for s in growing],
+                                                         [s.N for s in growing])):
+                s.Nj.append(Nj)
+
+            if not inner:
+                break
+
+        live = [s for s in live if not s.done]
+        for s in live:
+            s.p.append(0)
+
+        if i < p_bound:
+            for s, Mi in zip(live, mul_matrices_batch(ta.MAX_TIMES, [s.Mi for s in live], [s.M for s in live])):
+                s.Mi = Mi
+
+    return [s.result if s.done else (None, None) for s in searches]
+
+
+def attack_batch(Ms, Ns, Xs, As, Bs, p_bound, t_bound):
+    """
+    Runs the attack on K instances of the same size at once. Returns the list of results of attack.attack.
+    """
+    Ms, Ns, Xs, As, Bs = map(as_matrices, (Ms, Ns, Xs, As, Bs))
+    K = len(Ms)
+    if K == 0:
+        return []
+    n = len(Ms[0])
+    results = [None] * K
+
+    polys_A = find_polys_batch(n, Ms, Ns, Xs, As, p_bound, t_bound)
+    found = [k for k in range(K) if polys_A[k][0] is not None and polys_A[k][1] is not None]
+
+    polys_B = find_polys_batch(n, [Ms[k] for k in found], [Ns[k] for k in found], [Xs[k] for k in found],
+                               [Bs[k] for k in found], p_bound, t_bound)
+    for k, (q1, r1) in zip(found, polys_B):
+        if q1 is None or r1 is None:
+            continue
+        p1, t1 = polys_A[k]
+        k1 = calc_triple_product(Ms[k], Ns[k], Bs[k], p1, t1)
+        if triple_product_view(Ms[k], Ns[k], As[k], q1, r1).equals(k1):
+            results[k] = k1
+
+    return results
@@ -0,0 +1,208 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+import tropical_algebra as ta
+import matrix_utils
+from attack import attack
+from generate_instance import generate_random_instance, generate_random_matrix, \
+    generate_random_max_poly, generate_random_min_poly
+
+
+ALGEBRA_BENCHMARKS = [
+    "mul_matrices_max_times",
+    "mul_matrices_min_times",
+    "pwr_matrix_max_times",
+    "pwr_matrix_min_times",
+    "calc_poly_matrix_max_times",
+    "calc_poly_matrix_min_times",
+    "calc_triple_product",
+]
+"""The benchmarks of the algebra, they share the inputs generated by get_benchmarks."""
+
+
+def get_benchmarks(n, c_bound, degree, bound, names=None):
+    """
+    Returns a list of pairs (name, function) to measure for the given point of the grid, only the benchmarks
+    from names if they are given. All inputs are generated from a fixed seed, so every run measures the same work.
+    Only the inputs of the selected benchmarks are generated.
+    """
+    def selected(name):
+        return not names or name in names
+
+    def generate():
+        random.seed("benchmark-instance:%d:%d:%d" % (n, c_bound, degree))
+        return generate_random_instance(n, c_bound, degree)
+
+    benchmarks = []
+    algebra = [name for name in ALGEBRA_BENCHMARKS if selected(name)]
+    if algebra:
+        random.seed("benchmark:%d:%d:%d" % (n, c_bound, degree))
+        M = generate_random_matrix(n, 1, c_bound)
+        N = generate_random_matrix(n, 1, c_bound)
+        X = generate_random_matrix(n, 1, c_bound)
+        p = generate_random_max_poly(degree, 1, c_bound, 0.5)
+        t = generate_random_min_poly(degree, 1, c_bound, 0.5)
+        functions = {
+            "mul_matrices_max_times": lambda: ta.mul_matrices_max_times(M, X),
+            "mul_matrices_min_times": lambda: ta.mul_matrices_min_times(N, X),
+            "pwr_matrix_max_times": lambda: ta.pwr_matrix_max_times(M, degree),
+            "pwr_matrix_min_times": lambda: ta.pwr_matrix_min_times(N, degree),
+            "calc_poly_matrix_max_times": lambda: ta.calc_poly_matrix_max_times(M, p),
+            "calc_poly_matrix_min_times": lambda: ta.calc_poly_matrix_min_times(N, t),
+            "calc_triple_product": lambda: matrix_utils.calc_triple_product(M, N, X, p, t),
+        }
+        benchmarks += [(name, functions[name]) for name in algebra]
+
+    if selected("generate_random_instance"):
+        benchmarks.append(("generate_random_instance", generate))
+
+    if selected("attack"):
+        inst = generate()
+        benchmarks.append(("attack", lambda: attack(inst.M, inst.N, inst.X, inst.A, inst.B, bound, bound)))
+
+    return benchmarks
+
+
+def measure(function, repeat):
+    """
+    Returns the wall times of repeat runs of the function and the peak memory of one more run in bytes.
+    Caches are cleared before every run, so runs don't reuse each other's work.
+    """
+    times = []
+    for _ in range(repeat):
+        matrix_utils.power_cache.clear()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    # tracemalloc slows the code down, so the memory is measured in a separate run.
+    matrix_utils.power_cache.clear()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return times, peak
+
+
+def run_benchmarks(sizes, c_bounds, degrees, bound, repeat, names=None):
+    """
+    Runs the benchmarks over the grid of sizes, coefficient bounds and degrees. Returns a JSON-serializable dict.
+    """
+    results = []
+    for n in sizes:
+        for c_bound in c_bounds:
+            for degree in degrees:
+                for name, function in get_benchmarks(n, c_bound, degree, bound, names):
+                    times, peak = measure(function, repeat)
+                    results.append({
+                        "name": name,
+                        "n": n,
+                        "c_bound": c_bound,
+                        "degree": degree,
+                        "bound": bound,
+                        "time": statistics.median(times),
+                        "times": times,
+                        "peak_memory": peak,
+                    })
+                    print(name, n, c_bound, degree, "%.6f" % results[-1]["time"], peak, file=sys.stderr)
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def result_key(result):
+    """
+    Returns the point of the grid and the name of the benchmark of a result, results of two runs are compared by it.
+    """
+    return result["name"], result["n"], result["c_bound"], result["degree"], result["bound"]
+
+
+def compare_results(baseline, current, threshold):
+    """
+    Compares median times of two benchmark runs. Returns a list of tuples (key, baseline time, current time, ratio)
+    for the points which became slower by more than threshold (0.2 means 20%).
+    """
+    base = {result_key(r): r["time"] for r in baseline["results"]}
+    slowdowns = []
+    for r in current["results"]:
+        key = result_key(r)
+        if key not in base or base[key] <= 0:
+            continue
+        ratio = r["time"] / base[key]
+        if ratio > 1 + threshold:
+            slowdowns.append((key, base[key], r["time"], ratio))
+    return slowdowns
+
+
+def parse_list(value):
+    return [int(x) for x in value.split(",") if x]
+
+
+def get_arguments_parser():
+    """
+    Creates arguments parser with necessary options.
+    """
+    parser = argparse.ArgumentParser(
+        description="""
+        The script to measure the speed of the algebra and the attack.
+        """,
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="Run the benchmarks and write the results to a JSON file",
+                                formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    run.add_argument("--out", help="Output JSON file", required=True)
+    run.add_argument("--sizes", help="Comma separated sizes of matrices", default="3,5,8", type=parse_list)
+    run.add_argument("--c_bounds", help="Comma separated upper bounds for coefficients", default="10,1000",
+                     type=parse_list)
+    run.add_argument("--degrees", help="Comma separated degrees of polynomials", default="5,20", type=parse_list)
+    run.add_argument("--bound", help="p_bound and t_bound of the attack", default=20, type=int)
+    run.add_argument("--repeat", help="Number of runs of every benchmark", default=3, type=int)
+    run.add_argument("--only", help="Comma separated names of benchmarks to run", default="")
+
+    compare = subparsers.add_parser("compare", help="Compare the results with a baseline",
+                                    formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    compare.add_argument("baseline", help="Baseline JSON file")
+    compare.add_argument("current", help="Current JSON file")
+    compare.add_argument("--threshold", help="Allowed relative slowdown", default=0.2, type=float)
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = get_arguments_parser().parse_args()
+
+    if args.command == "run":
+        names = [x for x in args.only.split(",") if x]
+        report = run_benchmarks(args.sizes, args.c_bounds, args.degrees, args.bound, args.repeat, names)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=1)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        slowdowns = compare_results(baseline, current, args.threshold)
+        for key, base_time, time_, ratio in slowdowns:
+            print("SLOWER", *key, "%.6f -> %.6f (x%.2f)" % (base_time, time_, ratio))
+        print("slowdowns =", len(slowdowns))
+        sys.exit(1 if slowdowns else 0)
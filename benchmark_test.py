@@ -0,0 +1,46 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import unittest
+import benchmark
+
+
+def report(times):
+    return {"results": [{"name": name, "n": 3, "c_bound": 10, "degree": 5, "bound": 20, "time": time}
+                        for name, time in times.items()]}
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_parse_list(self):
+        self.assertEqual(benchmark.parse_list("3,5,8"), [3, 5, 8])
+        self.assertEqual(benchmark.parse_list("7,"), [7])
+        self.assertEqual(benchmark.parse_list(""), [])
+
+    def test_compare_results(self):
+        baseline = report({"attack": 1.0, "mul_matrices_max_times": 0.5, "pwr_matrix_max_times": 0.0})
+        self.assertEqual(benchmark.compare_results(
+            baseline, report({"attack": 1.1, "mul_matrices_max_times": 0.4, "calc_triple_product": 9.0}), 0.2), [])
+        slowdowns = benchmark.compare_results(
+            baseline, report({"attack": 1.5, "mul_matrices_max_times": 0.5, "pwr_matrix_max_times": 1.0}), 0.2)
+        self.assertEqual(slowdowns, [(("attack", 3, 10, 5, 20), 1.0, 1.5, 1.5)])
+
+
+    def test_get_benchmarks(self):
+        names = [name for name, _ in benchmark.get_benchmarks(3, 10, 5, 20)]
+        self.assertEqual(names, benchmark.ALGEBRA_BENCHMARKS + ["generate_random_instance", "attack"])
+        selected = benchmark.get_benchmarks(3, 10, 5, 20, ["calc_triple_product", "attack"])
+        self.assertEqual([name for name, _ in selected], ["calc_triple_product", "attack"])
+        # The inputs don't depend on the selected benchmarks.
+        all_functions = dict(benchmark.get_benchmarks(3, 10, 5, 20))
+        for name, function in selected:
+            self.assertEqual(function(), all_functions[name]())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,54 +8,257 @@ I. Buchinskiy, M. Kotov, A. Treier, 2022
 """
 
 import argparse
-from attack import attack
-from generate_instance import generate_random_instance
+import itertools
+import instrumentation
+import multiprocessing
+import random
+from collections import namedtuple
+from attack import attack, Budget, BudgetExceeded
+from attack_cache import AttackCache
+from batch_attack import attack_batch
+from corpus import CorpusReader
+from generate_instance import SeededInstances
 
+OK = "OK"
+FAILED = "FAILED"
+INCORRECT = "INCORRECT"
+TIMEOUT = "TIMEOUT"
 
-def check_attack(count, n, c_bound, d_bound, p_bound, t_bound):
+InstanceResult = namedtuple("InstanceResult", ["index", "status", "instance"])
+"""The outcome of the attack on one instance: its index, OK/FAILED/INCORRECT/TIMEOUT and the instance itself."""
+
+_worker_instances = None
+"""The instances of the run in a worker process of check_attack, see _init_worker."""
+
+
+def _init_worker(instances):
+    """
+    Keeps the instances in the worker process, so a corpus is opened once per worker instead of once per task.
+    """
+    global _worker_instances
+    _worker_instances = instances
+
+
+def get_status(k1, inst):
+    """
+    Returns OK, FAILED or INCORRECT for the key k1 found by the attack on the instance.
+    """
+    if not k1:
+        return FAILED
+    if k1 != inst.kA:
+        return INCORRECT
+    return OK
+
+
+def run_instance(task):
+    """
+    Takes the instance number index and runs the attack on it.
+    task is a tuple (index, instances, p_bound, t_bound, cache, budget, window), where instances is
+    SeededInstances or CorpusReader (None in the worker processes of check_attack, which keep the instances),
+    cache is an AttackCache or None, budget is a pair (seconds, products) for Budget or None, and window is
+    the number of powers kept in memory or None.
+    """
+    index, instances, p_bound, t_bound, cache, budget, window = task
+    if instances is None:
+        instances = _worker_instances
+    inst = instances[index]
+
+    try:
+        k1 = attack(inst.M, inst.N, inst.X, inst.A, inst.B, p_bound, t_bound, cache=cache,
+                    budget=Budget(*budget) if budget else None, window=window)
+    except BudgetExceeded:
+        return InstanceResult(index, TIMEOUT, inst)
+
+    return InstanceResult(index, get_status(k1, inst), inst)
+
+
+def run_batch(task):
+    """
+    Takes the instances with the given indices and runs the batched attack on all of them at once.
+    task is a tuple (indices, instances, p_bound, t_bound, cache). Returns a list of InstanceResult.
+    If cache is not None, the instances with cached outcomes are skipped and new outcomes are cached.
+    instances is None in the worker processes of check_attack as in run_instance.
+    """
+    indices, instances, p_bound, t_bound, cache = task
+    if instances is None:
+        instances = _worker_instances
+    insts = [instances[index] for index in indices]
+    keys = [None] * len(insts)
+    todo = list(range(len(insts)))
+
+    if cache is not None:
+        outcome_keys = [cache.outcome_key(inst.M, inst.N, inst.X, inst.A, inst.B, p_bound, t_bound)
+                        for inst in insts]
+        todo = []
+        for k, key in enumerate(outcome_keys):
+            try:
+                keys[k] = cache.get("outcome", key)
+            except KeyError:
+                todo.append(k)
+
+    todo_insts = [insts[k] for k in todo]
+    found = attack_batch([inst.M for inst in todo_insts], [inst.N for inst in todo_insts],
+                         [inst.X for inst in todo_insts], [inst.A for inst in todo_insts],
+                         [inst.B for inst in todo_insts], p_bound, t_bound)
+    for k, k1 in zip(todo, found):
+        keys[k] = k1
+        if cache is not None:
+            cache.put("outcome", outcome_keys[k], k1)
+
+    return [InstanceResult(index, get_status(k1, inst), inst) for index, inst, k1 in zip(indices, insts, keys)]
+
+
+def run_with_stats(task):
+    """
+    Runs worker(task) for task = (worker, task) with instrumentation enabled. Returns the result and the Stats.
+    """
+    worker, task = task
+    with instrumentation.collect() as stats:
+        result = worker(task)
+    return result, stats
+
+
+def print_stats(stats):
+    """
+    Prints the aggregated operation counters and phase times.
+    """
+    for name in sorted(stats.counters):
+        print("counter", name, "=", stats.counters[name])
+    for name in sorted(stats.timers):
+        print("time", name, "=", "%.6f" % stats.timers[name])
+    if stats.counters.get("nominal_steps"):
+        print("search space removed by degree bounds =",
+              1 - stats.counters["clamped_steps"] / stats.counters["nominal_steps"])
+
+
+def print_result(result):
+    """
+    Prints the outcome of the attack on one instance, and the instance itself if the attack didn't succeed.
+    """
+    print(result.index, result.status)
+    if result.status != OK:
+        inst = result.instance
+        print("M =", inst.M)
+        print("N =", inst.N)
+        print("X =", inst.X)
+        print("p =", inst.p)
+        print("t =", inst.t)
+        print("q =", inst.q)
+        print("r =", inst.r)
+
+
+def print_results(results, count):
+    """
+    Prints the outcomes of the attack on count instances as they come, and then the summary.
+    """
+    failed = 0
+    incorrect = 0
+    timeouts = 0
+    for result in results:
+        print_result(result)
+        if result.status == FAILED:
+            failed += 1
+        elif result.status == INCORRECT:
+            incorrect += 1
+        elif result.status == TIMEOUT:
+            timeouts += 1
+
+    # An empty corpus or count = 0 have no success rate.
+    success_rate = (count - failed - incorrect - timeouts) / count if count else 0.0
+    print("failed =", failed, "incorrect =", incorrect, "timeout =", timeouts, "success rate =", success_rate)
+
+
+def check_attack(count, n, c_bound, d_bound, p_bound, t_bound, jobs=1, seed=None, batch=1, stats=False,
+                 corpus=None, cache=None, timeout=None, max_products=None, window=None, cache_max_bytes=None):
     """
     Generates and runs instances to check the attack.
     c_bound is the upper bound for coefficients of matrices and polynomials.
     d_bound is the apper bound for degrees of polynomials.
     p_bound and t_bound are the bound to search polynomials p' and t' respectively (also, q' and r').
+    jobs is the number of worker processes. Every instance is generated from its own seed derived from seed,
+    so the results don't depend on jobs. If seed is None, a random seed is used and printed.
+    If batch > 1, instances are attacked in batches of this size by batch_attack.attack_batch.
+    If stats is True, operation counters and phase times are collected in the workers and printed in aggregate.
+    If corpus is the path of a corpus file, its instances are attacked instead of generating new ones;
+    then n, c_bound, d_bound and seed are ignored, and count limits the number of instances if it isn't None.
+    If cache is the path of a directory, the outcomes and the search states are cached there (see AttackCache),
+    so instances attacked before are skipped and searches are resumed when the bounds are raised.
+    cache_max_bytes bounds the size of the cache directory.
+    timeout (in seconds) and max_products limit the work on every instance, the instances which exceed
+    the limits are reported as TIMEOUT. The limits are not supported with batch > 1.
+    If window is given, the searches keep only the last window powers of M and N in memory and the others
+    in temporary files (see power_store.PowerStore), as well as the matrices of the paused rows of the searches.
+    It is not supported with batch > 1 either.
     """
-    failed = 0
-    incorrect = 0
+    if batch > 1 and (timeout is not None or max_products is not None):
+        raise ValueError("timeout and max_products are not supported in batches")
+    if batch > 1 and window is not None:
+        raise ValueError("window is not supported in batches")
+    budget = None
+    if timeout is not None or max_products is not None:
+        budget = (timeout, max_products)
+    if cache is not None:
+        cache = AttackCache(cache, cache_max_bytes)
+    if corpus is not None:
+        instances = CorpusReader(corpus)
+        count = len(instances) if count is None else min(count, len(instances))
+    else:
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
+            # The seed is needed to generate the instances again.
+            print("seed =", seed)
+        instances = SeededInstances(count, n, c_bound, d_bound, seed)
+    # The worker processes get the instances once from _init_worker, so the tasks don't carry them.
+    task_instances = instances if jobs <= 1 else None
+    if batch > 1:
+        worker = run_batch
+        tasks = [(range(i, min(i + batch, count)), task_instances, p_bound, t_bound, cache)
+                 for i in range(0, count, batch)]
+    else:
+        worker = run_instance
+        tasks = [(i, task_instances, p_bound, t_bound, cache, budget, window) for i in range(count)]
+
+    if stats:
+        tasks = [(worker, task) for task in tasks]
+        worker = run_with_stats
+        total_stats = instrumentation.Stats()
+
+    if jobs > 1:
+        pool = multiprocessing.Pool(jobs, _init_worker, (instances,))
+        results = pool.imap(worker, tasks)
+    else:
+        pool = None
+        results = map(worker, tasks)
+    if stats:
+        results = _merge_stats(results, total_stats)
+    if batch > 1:
+        results = itertools.chain.from_iterable(results)
+
+    try:
+        print_results(results, count)
+    except BaseException:
+        # Don't wait for the queued instances after an error or an interrupt.
+        if pool is not None:
+            pool.terminate()
+        raise
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        if corpus is not None:
+            instances.close()
+
+    if stats:
+        print_stats(total_stats)
 
-    for i in range(count):
-        print(i, end=" ")
-        inst = generate_random_instance(n, c_bound, d_bound)
-
-        k1 = attack(inst.M, inst.N, inst.X, inst.A, inst.B, p_bound, t_bound)
-
-        if not k1:
-            print("FAILED")
-            print("M =", inst.M)
-            print("N =", inst.N)
-            print("X =", inst.X)
-            print("p =", inst.p)
-            print("t =", inst.t)
-            print("q =", inst.q)
-            print("r =", inst.r)
-            failed += 1
-        elif k1 != inst.kA:
-            print("INCORRECT")
-            print("M =", inst.M)
-            print("N =", inst.N)
-            print("X =", inst.X)
-            print("p =", inst.p)
-            print("t =", inst.t)
-            print("q =", inst.q)
-            print("r =", inst.r)
-            incorrect += 1
-        else:
-            print("OK")
 
-    print("failed =", failed, "incorrect =", incorrect,
-          "success rate =", (count - failed - incorrect) / count)
+def _merge_stats(results, total_stats):
+    for result, stats in results:
+        total_stats.merge(stats)
+        yield result
 
 
-def get_arguments_parser():
+def get_arguments_parser(add_help=True):
     """
     Creates arguments parser with necessary options.
     """
@@ -63,31 +266,32 @@ def get_arguments_parser():
         description="""
         The script to check the attack.
         """,
-        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        add_help=add_help
     )
 
     parser.add_argument(
         "--count",
-        help="Number of tests",
-        required=True,
+        help="Number of tests, all instances of the corpus if not given with --corpus",
+        default=None,
         type=int
     )
     parser.add_argument(
         "--size",
         help="Size of matrices",
-        required=True,
+        default=None,
         type=int
     )
     parser.add_argument(
         "--d_bound",
         help="Bound for degrees of polynomials",
-        required=True,
+        default=None,
         type=int
     )
     parser.add_argument(
         "--c_bound",
         help="Upper bound for coefficients",
-        required=True,
+        default=None,
         type=int
     )
     parser.add_argument(
@@ -102,12 +306,79 @@ def get_arguments_parser():
         required=True,
         type=int
     )
+    parser.add_argument(
+        "--jobs",
+        help="Number of worker processes",
+        default=1,
+        type=int
+    )
+    parser.add_argument(
+        "--batch",
+        help="Number of instances attacked at once in lock-step",
+        default=1,
+        type=int
+    )
+    parser.add_argument(
+        "--stats",
+        help="Print aggregated operation counters and phase times",
+        action="store_true"
+    )
+    parser.add_argument(
+        "--seed",
+        help="Base seed for instances, random if not given",
+        default=None,
+        type=int
+    )
+    parser.add_argument(
+        "--corpus",
+        help="Attack the instances of a corpus file made by corpus.py instead of generating them",
+        default=None
+    )
+    parser.add_argument(
+        "--timeout",
+        help="Wall-clock limit for the attack on one instance in seconds",
+        default=None,
+        type=float
+    )
+    parser.add_argument(
+        "--max_products",
+        help="Limit for the number of matrix products in the attack on one instance",
+        default=None,
+        type=int
+    )
+    parser.add_argument(
+        "--window",
+        help="Number of powers of M and N kept in memory, the others and the matrices of the paused rows "
+             "of the search are kept in temporary files",
+        default=None,
+        type=int
+    )
+    parser.add_argument(
+        "--cache",
+        help="Directory to cache outcomes and resumable search states between runs",
+        default=None
+    )
+    parser.add_argument(
+        "--cache_max_bytes",
+        help="Limit for the size of the cache directory, the least recently used entries are removed first",
+        default=None,
+        type=int
+    )
 
     return parser
 
 
 if __name__ == "__main__":
-    args = get_arguments_parser().parse_args()
+    parser = get_arguments_parser()
+    args = parser.parse_args()
+    if args.corpus is None and None in (args.count, args.size, args.c_bound, args.d_bound):
+        parser.error("--count, --size, --c_bound and --d_bound are required without --corpus")
+    if args.batch > 1 and (args.timeout is not None or args.max_products is not None):
+        parser.error("--timeout and --max_products are not supported with --batch")
+    if args.batch > 1 and args.window is not None:
+        parser.error("--window is not supported with --batch")
 
     check_attack(args.count, args.size, args.c_bound,
-                 args.d_bound, args.p_bound, args.t_bound)
+                 args.d_bound, args.p_bound, args.t_bound, args.jobs, args.seed, args.batch,
+                 args.stats, args.corpus, args.cache, args.timeout, args.max_products, args.window,
+                 args.cache_max_bytes)
@@ -0,0 +1,227 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+
+A corpus is a file of pregenerated instances which can be attacked many times without generating them again.
+The file consists of
+    MAGIC, the length of the metadata (a varint), the metadata (JSON),
+    the records of instances,
+    the offsets of the records (8-byte little-endian integers),
+    the offset of the table of offsets and the number of records (8-byte little-endian integers).
+A record is n followed by M, N, X, the polynomials p, t, q, r (each is its length and coefficients),
+and A, B, kA; all numbers are stored by write_entry.
+"""
+
+import argparse
+import json
+import mmap
+import multiprocessing
+import random
+import struct
+from entry_codec import read_entry, read_varint, write_entry, write_varint
+from generate_instance import Instance, SeededInstances
+
+MAGIC = b"TROPCRP1"
+_TRAILER = struct.Struct("<QQ")
+
+
+def _write_matrix(out, A):
+    for row in A:
+        for a in row:
+            write_entry(out, a)
+
+
+def _read_matrix(buf, pos, n):
+    A = []
+    for _ in range(n):
+        row = []
+        for _ in range(n):
+            a, pos = read_entry(buf, pos)
+            row.append(a)
+        A.append(row)
+    return A, pos
+
+
+def _write_poly(out, p):
+    write_varint(out, len(p))
+    for a in p:
+        write_entry(out, a)
+
+
+def _read_poly(buf, pos):
+    d, pos = read_varint(buf, pos)
+    p = []
+    for _ in range(d):
+        a, pos = read_entry(buf, pos)
+        p.append(a)
+    return p, pos
+
+
+def encode_instance(inst):
+    """
+    Returns the record of the instance. kB is not stored since it equals kA.
+    """
+    out = bytearray()
+    write_varint(out, len(inst.M))
+    for A in (inst.M, inst.N, inst.X):
+        _write_matrix(out, A)
+    for p in (inst.p, inst.t, inst.q, inst.r):
+        _write_poly(out, p)
+    for A in (inst.A, inst.B, inst.kA):
+        _write_matrix(out, A)
+    return out
+
+
+def decode_instance(buf, pos):
+    """
+    Reads the record of an instance from buf at pos.
+    """
+    inst = Instance()
+    n, pos = read_varint(buf, pos)
+    inst.M, pos = _read_matrix(buf, pos, n)
+    inst.N, pos = _read_matrix(buf, pos, n)
+    inst.X, pos = _read_matrix(buf, pos, n)
+    inst.p, pos = _read_poly(buf, pos)
+    inst.t, pos = _read_poly(buf, pos)
+    inst.q, pos = _read_poly(buf, pos)
+    inst.r, pos = _read_poly(buf, pos)
+    inst.A, pos = _read_matrix(buf, pos, n)
+    inst.B, pos = _read_matrix(buf, pos, n)
+    inst.kA, pos = _read_matrix(buf, pos, n)
+    inst.kB = inst.kA
+    return inst
+
+
+class CorpusWriter:
+    """
+    Writes instances to a corpus file one by one. The table of offsets is written by close.
+    """
+
+    def __init__(self, path, metadata=None):
+        self.path = path
+        self._file = open(path, "wb")
+        self._offsets = []
+        header = bytearray(MAGIC)
+        data = json.dumps(metadata or {}).encode()
+        write_varint(header, len(data))
+        header += data
+        self._file.write(header)
+        self._pos = len(header)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, inst):
+        record = encode_instance(inst)
+        self._offsets.append(self._pos)
+        self._file.write(record)
+        self._pos += len(record)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.write(struct.pack("<%dQ" % len(self._offsets), *self._offsets))
+        self._file.write(_TRAILER.pack(self._pos, len(self._offsets)))
+        self._file.close()
+
+
+class CorpusReader:
+    """
+    A read-only sequence of the instances of a memory-mapped corpus file.
+    Instances are decoded on access, so the corpus can be streamed or read at random.
+    Pickling a reader pickles only the path, so it can be passed to worker processes.
+    """
+
+    def __init__(self, path):
+        self._open(path)
+
+    def _open(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._buf[:len(MAGIC)] != MAGIC:
+            raise ValueError(path + " is not a corpus file")
+        size, pos = read_varint(self._buf, len(MAGIC))
+        self.metadata = json.loads(self._buf[pos:pos + size].decode())
+        index_offset, count = _TRAILER.unpack_from(self._buf, len(self._buf) - _TRAILER.size)
+        self._offsets = struct.unpack_from("<%dQ" % count, self._buf, index_offset)
+
+    def __getstate__(self):
+        return self.path
+
+    def __setstate__(self, path):
+        self._open(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._buf.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        return decode_instance(self._buf, self._offsets[index])
+
+    def __iter__(self):
+        for offset in self._offsets:
+            yield decode_instance(self._buf, offset)
+
+
+def generate_corpus(path, count, n, c_bound, d_bound, seed=None, jobs=1):
+    """
+    Generates count instances and writes them to a corpus file.
+    The instance number index is the same as check_attack generates from the same seed.
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+    instances = SeededInstances(count, n, c_bound, d_bound, seed)
+    metadata = {"count": count, "size": n, "c_bound": c_bound, "d_bound": d_bound, "seed": seed}
+
+    with CorpusWriter(path, metadata) as writer:
+        if jobs > 1:
+            with multiprocessing.Pool(jobs) as pool:
+                for inst in pool.imap(instances.__getitem__, range(count)):
+                    writer.write(inst)
+        else:
+            for inst in instances:
+                writer.write(inst)
+
+
+def get_arguments_parser():
+    """
+    Creates arguments parser with necessary options.
+    """
+    parser = argparse.ArgumentParser(
+        description="""
+        The script to generate a corpus of instances for check_attack.py --corpus.
+        """,
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument("--out", help="Output corpus file", required=True)
+    parser.add_argument("--count", help="Number of instances", required=True, type=int)
+    parser.add_argument("--size", help="Size of matrices", required=True, type=int)
+    parser.add_argument("--d_bound", help="Bound for degrees of polynomials", required=True, type=int)
+    parser.add_argument("--c_bound", help="Upper bound for coefficients", required=True, type=int)
+    parser.add_argument("--seed", help="Base seed for instances, random if not given", default=None, type=int)
+    parser.add_argument("--jobs", help="Number of worker processes", default=1, type=int)
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = get_arguments_parser().parse_args()
+
+    generate_corpus(args.out, args.count, args.size, args.c_bound, args.d_bound, args.seed, args.jobs)
@@ -0,0 +1,66 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import contextlib
+import io
+import os
+import pickle
+import tempfile
+import unittest
+import check_attack
+import corpus
+from generate_instance import SeededInstances
+
+FIELDS = ["M", "N", "X", "p", "t", "q", "r", "A", "B", "kA", "kB"]
+
+
+class TestCorpus(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".corpus")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_round_trip(self):
+        instances = SeededInstances(7, 3, 10 ** 6, 5, 11)
+        corpus.generate_corpus(self.path, len(instances), 3, 10 ** 6, 5, seed=11)
+        with corpus.CorpusReader(self.path) as reader:
+            self.assertEqual(len(reader), 7)
+            self.assertEqual(reader.metadata["seed"], 11)
+            for expected, inst in zip(instances, reader):
+                for field in FIELDS:
+                    self.assertEqual(getattr(inst, field), getattr(expected, field))
+            self.assertEqual(reader[4].A, instances[4].A)
+            self.assertEqual(pickle.loads(pickle.dumps(reader))[6].kA, instances[6].kA)
+
+        # The worker processes open the corpus once and get only indices.
+        outputs = []
+        for options in [{"corpus": self.path, "jobs": 2}, {"seed": 11}]:
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                check_attack.check_attack(7, 3, 10 ** 6, 5, 10, 10, **options)
+            outputs.append(out.getvalue())
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_empty(self):
+        with corpus.CorpusWriter(self.path, {"size": 3}):
+            pass
+        with corpus.CorpusReader(self.path) as reader:
+            self.assertEqual(len(reader), 0)
+            self.assertEqual(list(reader), [])
+            self.assertEqual(reader.metadata, {"size": 3})
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            check_attack.check_attack(None, None, None, None, 5, 5, corpus=self.path)
+        self.assertEqual(out.getvalue(), "failed = 0 incorrect = 0 timeout = 0 success rate = 0.0\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
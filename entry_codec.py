@@ -0,0 +1,64 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+
+A compact binary encoding of integers of any length and infty, shared by the corpus files, the shared memory
+of the parallel products and the power stores.
+"""
+
+import tropical_algebra as ta
+
+
+def write_varint(out, x):
+    """
+    Appends a non-negative integer x to the bytearray out in the LEB128 format.
+    """
+    while x >= 0x80:
+        out.append((x & 0x7F) | 0x80)
+        x >>= 7
+    out.append(x)
+
+
+def read_varint(buf, pos):
+    """
+    Reads a varint written by write_varint from buf at pos. Returns the number and the position after it.
+    """
+    x = 0
+    shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        x |= (b & 0x7F) << shift
+        if b < 0x80:
+            return x, pos
+        shift += 7
+
+
+def write_entry(out, a):
+    """
+    Appends an entry (an integer of any length or infty) to the bytearray out.
+    The entry is a varint tag: 0 for infty, 2L + 1 or 2L + 2 for a non-negative or negative integer
+    of L bytes, followed by the absolute value in L little-endian bytes.
+    """
+    if a == ta.INFTY:
+        out.append(0)
+        return
+    size = (abs(a).bit_length() + 7) // 8
+    write_varint(out, 2 * size + (1 if a >= 0 else 2))
+    out += abs(a).to_bytes(size, "little")
+
+
+def read_entry(buf, pos):
+    """
+    Reads an entry written by write_entry from buf at pos. Returns the entry and the position after it.
+    """
+    tag, pos = read_varint(buf, pos)
+    if tag == 0:
+        return ta.INFTY, pos
+    size = (tag - 1) // 2
+    a = int.from_bytes(buf[pos:pos + size], "little")
+    return (a if tag % 2 else -a), pos + size
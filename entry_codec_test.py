@@ -0,0 +1,27 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import unittest
+import entry_codec
+import tropical_algebra as ta
+
+
+class TestEntryCodec(unittest.TestCase):
+    def test_entries(self):
+        for a in [0, 1, 127, 128, 255, 256, -1, -300, 2 ** 1000 + 7, -2 ** 70, ta.INFTY]:
+            out = bytearray()
+            entry_codec.write_entry(out, a)
+            entry_codec.write_varint(out, 300)
+            b, pos = entry_codec.read_entry(out, 0)
+            self.assertEqual(b, a)
+            self.assertEqual(entry_codec.read_varint(out, pos), (300, len(out)))
+
+
+if __name__ == "__main__":
+    unittest.main()
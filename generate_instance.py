@@ -83,3 +83,32 @@ def generate_random_instance(n, u, d):
 
         if result.kA == result.kB:
             return result
+
+
+def instance_seed(seed, index):
+    """
+    Returns the seed of the instance number index, it depends only on the base seed and the index.
+    """
+    return str(seed) + ":" + str(index)
+
+
+class SeededInstances:
+    """
+    A sequence of count random instances, the instance number index is generated from its own seed on access.
+    """
+
+    def __init__(self, count, n, u, d, seed):
+        self.count = count
+        self.n = n
+        self.u = u
+        self.d = d
+        self.seed = seed
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError("instance index out of range")
+        random.seed(instance_seed(self.seed, index))
+        return generate_random_instance(self.n, self.u, self.d)
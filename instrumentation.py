@@ -0,0 +1,98 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import contextlib
+import time
+
+
+class Stats:
+    """
+    Operation counters and per-phase wall times collected while instrumentation is enabled.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.timers = {}
+
+    def __repr__(self):
+        return "Stats(counters=" + repr(self.counters) + ", timers=" + repr(self.timers) + ")"
+
+    def count(self, name, k=1):
+        self.counters[name] = self.counters.get(name, 0) + k
+
+    def add_time(self, name, seconds):
+        self.timers[name] = self.timers.get(name, 0.0) + seconds
+
+    def merge(self, other):
+        """
+        Adds the counters and the times of other to this object.
+        """
+        for name, k in other.counters.items():
+            self.count(name, k)
+        for name, seconds in other.timers.items():
+            self.add_time(name, seconds)
+
+    def to_dict(self):
+        return {"counters": dict(self.counters), "timers": dict(self.timers)}
+
+
+_current = None
+_disabled_phase = contextlib.nullcontext()
+
+
+def enabled():
+    """
+    Returns True iff statistics are being collected.
+    """
+    return _current is not None
+
+
+def count(name, k=1):
+    """
+    Increments the counter name by k if statistics are being collected.
+    """
+    if _current is not None:
+        _current.count(name, k)
+
+
+class _Phase:
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.stats.add_time(self.name, time.perf_counter() - self.start)
+
+
+def phase(name):
+    """
+    Returns a context manager which adds its wall time to the timer name if statistics are being collected.
+    """
+    if _current is None:
+        return _disabled_phase
+    return _Phase(_current, name)
+
+
+@contextlib.contextmanager
+def collect(stats=None):
+    """
+    Enables instrumentation inside the with block. Yields the Stats object which receives the statistics.
+    """
+    global _current
+    if stats is None:
+        stats = Stats()
+    previous = _current
+    _current = stats
+    try:
+        yield stats
+    finally:
+        _current = previous
@@ -0,0 +1,469 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+
+A job server which hands out the instances of check_attack to workers on several machines.
+The server and the workers exchange JSON lines over TCP or a Unix socket:
+a worker sends {"op": "pull"} and gets
+{"op": "job", "lease": id, "indices": [...], "spec": {...}, "heartbeat": seconds},
+{"op": "wait", "delay": seconds} or {"op": "done"}, and it sends
+{"op": "result", "lease": id, "index": index, "status": status} for every attacked instance
+and {"op": "heartbeat", "lease": id} every heartbeat seconds while it attacks the instances of the lease.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from collections import deque
+from attack_cache import AttackCache
+from check_attack import InstanceResult, OK, get_arguments_parser, print_results, run_instance
+from corpus import CorpusReader
+from generate_instance import SeededInstances
+
+LEASE_TIMEOUT = 60.0
+"""Seconds without results or heartbeats after which the instances of a lease are handed out again."""
+
+POLL_INTERVAL = 0.5
+"""Seconds between the checks that the local workers are alive while run_jobs waits for results."""
+
+
+def parse_address(address):
+    """
+    Returns (host, port) for "host:port" and the path of a Unix socket otherwise.
+    """
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return host, int(port)
+    return address
+
+
+def make_spec(count, n, c_bound, d_bound, p_bound, t_bound, seed=None, corpus=None, cache=None, timeout=None,
+              max_products=None, window=None, cache_max_bytes=None):
+    """
+    Returns the description of the instances and of the attack sent to the workers, the arguments are the ones
+    of check_attack.check_attack. The paths of the corpus and of the cache must be valid on the workers.
+    """
+    return {"count": count, "n": n, "c_bound": c_bound, "d_bound": d_bound, "seed": seed, "corpus": corpus,
+            "p_bound": p_bound, "t_bound": t_bound, "cache": cache, "timeout": timeout,
+            "max_products": max_products, "window": window, "cache_max_bytes": cache_max_bytes}
+
+
+def open_instances(spec):
+    """
+    Returns the instances described by the spec: CorpusReader or SeededInstances.
+    """
+    if spec["corpus"] is not None:
+        return CorpusReader(spec["corpus"])
+    return SeededInstances(spec["count"], spec["n"], spec["c_bound"], spec["d_bound"], spec["seed"])
+
+
+class _Lease:
+    def __init__(self, indices, owner, deadline):
+        self.indices = indices
+        self.owner = owner
+        self.deadline = deadline
+
+
+class JobServer:
+    """
+    Hands out the indices of count instances to workers in leases of lease_size indices and collects the statuses.
+    Every result and every heartbeat renews its lease. The remaining indices of a lease are handed out again if its
+    worker disconnects or sends nothing for lease_timeout seconds, and the first result for an index wins.
+    on_result(index, status) is called for every new result.
+    """
+
+    def __init__(self, spec, count, lease_size=1, lease_timeout=LEASE_TIMEOUT, on_result=None):
+        self.spec = spec
+        self.count = count
+        self.lease_timeout = lease_timeout
+        self.on_result = on_result
+        self.results = {}
+        self.reissued = 0
+        self.address = None
+        self._pending = deque(list(range(i, min(i + lease_size, count))) for i in range(0, count, lease_size))
+        self._leases = {}
+        self._next_lease = 0
+        self._server = None
+        self._connections = {}
+        self._done = None
+
+    async def start(self, address):
+        """
+        Starts listening at address, (host, port) or the path of a Unix socket. Port 0 picks a free port,
+        the actual address is in self.address.
+        """
+        self._done = asyncio.Event()
+        if len(self.results) == self.count:
+            self._done.set()
+        if isinstance(address, tuple):
+            self._server = await asyncio.start_server(self._handle, *address)
+            self.address = self._server.sockets[0].getsockname()[:2]
+        else:
+            self._server = await asyncio.start_unix_server(self._handle, address)
+            self.address = address
+
+    async def wait(self):
+        """
+        Waits until all instances have results or stop is called.
+        """
+        await self._done.wait()
+
+    def stop(self):
+        self._done.set()
+
+    @property
+    def connections(self):
+        """
+        The number of connected workers.
+        """
+        return len(self._connections)
+
+    async def close(self):
+        """
+        Stops listening and drops the connections of the workers.
+        """
+        self._server.close()
+        for writer in self._connections.values():
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await self._server.wait_closed()
+        if not isinstance(self.address, tuple) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                reply = self._dispatch(json.loads(line), writer)
+                writer.write(json.dumps(reply).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[task]
+            self._release(writer)
+            writer.close()
+
+    def _dispatch(self, message, owner):
+        if message["op"] == "pull":
+            return self._lease(owner)
+        if message["op"] == "result":
+            self._record(message["lease"], message["index"], message["status"])
+            return {"op": "ok"}
+        if message["op"] == "heartbeat":
+            self._renew(message["lease"])
+            return {"op": "ok"}
+        return {"op": "error", "message": "unknown op " + repr(message["op"])}
+
+    def _lease(self, owner):
+        now = time.monotonic()
+        for lease_id, lease in list(self._leases.items()):
+            if lease.deadline <= now:
+                self._reissue(lease_id)
+
+        while self._pending:
+            indices = [index for index in self._pending.popleft() if index not in self.results]
+            if indices:
+                lease_id = self._next_lease
+                self._next_lease += 1
+                self._leases[lease_id] = _Lease(indices, owner, now + self.lease_timeout)
+                # Heartbeats are sent three times per lease timeout, so one late heartbeat doesn't lose the lease.
+                return {"op": "job", "lease": lease_id, "indices": indices, "spec": self.spec,
+                        "heartbeat": self.lease_timeout / 3}
+
+        if len(self.results) == self.count:
+            return {"op": "done"}
+        # All remaining instances are leased, the worker asks again when the first lease may expire.
+        deadline = min(lease.deadline for lease in self._leases.values())
+        return {"op": "wait", "delay": min(max(deadline - now, 0.05), 1.0)}
+
+    def _reissue(self, lease_id):
+        lease = self._leases.pop(lease_id)
+        indices = [index for index in lease.indices if index not in self.results]
+        if indices:
+            self._pending.appendleft(indices)
+            self.reissued += 1
+
+    def _release(self, owner):
+        for lease_id, lease in list(self._leases.items()):
+            if lease.owner is owner:
+                self._reissue(lease_id)
+
+    def _renew(self, lease_id):
+        lease = self._leases.get(lease_id)
+        if lease is not None:
+            lease.deadline = time.monotonic() + self.lease_timeout
+        return lease
+
+    def _record(self, lease_id, index, status):
+        lease = self._renew(lease_id)
+        if index in self.results:
+            return
+        self.results[index] = status
+        if self.on_result is not None:
+            self.on_result(index, status)
+        if lease is not None and all(i in self.results for i in lease.indices):
+            del self._leases[lease_id]
+        if len(self.results) == self.count:
+            self._done.set()
+
+
+def _connect(address):
+    if isinstance(address, tuple):
+        return socket.create_connection(address)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(address)
+    return sock
+
+
+def _request(f, message):
+    """
+    Sends a message and returns the reply, or None if the server has closed the connection.
+    """
+    try:
+        f.write(json.dumps(message).encode() + b"\n")
+        f.flush()
+        line = f.readline()
+    except ConnectionError:
+        return None
+    return json.loads(line) if line else None
+
+
+class _Heartbeat(threading.Thread):
+    """
+    Sends heartbeats for a lease every interval seconds until stop is called. lock guards the connection f,
+    which is shared with the requests of the worker.
+    """
+
+    def __init__(self, f, lock, lease, interval):
+        super().__init__(daemon=True)
+        self.f = f
+        self.lock = lock
+        self.lease = lease
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            with self.lock:
+                if _request(self.f, {"op": "heartbeat", "lease": self.lease}) is None:
+                    return
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def run_worker(address):
+    """
+    Attacks the instances handed out by the job server at address until the server says that all are done
+    or closes the connection. Returns the number of attacked instances.
+    """
+    attacked = 0
+    opened = {}
+    lock = threading.Lock()
+    try:
+        with _connect(address) as sock, sock.makefile("rwb") as f:
+            while True:
+                with lock:
+                    reply = _request(f, {"op": "pull"})
+                if reply is None or reply["op"] == "done":
+                    break
+                if reply["op"] == "wait":
+                    time.sleep(reply["delay"])
+                    continue
+
+                spec = reply["spec"]
+                key = json.dumps(spec, sort_keys=True)
+                if key not in opened:
+                    cache = None
+                    if spec["cache"] is not None:
+                        cache = AttackCache(spec["cache"], spec["cache_max_bytes"])
+                    opened[key] = open_instances(spec), cache
+                instances, cache = opened[key]
+                budget = None
+                if spec["timeout"] is not None or spec["max_products"] is not None:
+                    budget = (spec["timeout"], spec["max_products"])
+
+                heartbeat = _Heartbeat(f, lock, reply["lease"], reply["heartbeat"])
+                heartbeat.start()
+                try:
+                    for index in reply["indices"]:
+                        result = run_instance((index, instances, spec["p_bound"], spec["t_bound"], cache, budget,
+                                               spec["window"]))
+                        with lock:
+                            ack = _request(f, {"op": "result", "lease": reply["lease"], "index": index,
+                                                    "status": result.status})
+                        if ack is None:
+                            return attacked
+                        attacked += 1
+                finally:
+                    heartbeat.stop()
+    except ConnectionError:
+        # The server has gone, closing the socket may fail to flush the last request.
+        pass
+    finally:
+        for instances, _ in opened.values():
+            if isinstance(instances, CorpusReader):
+                instances.close()
+    return attacked
+
+
+def run_jobs(spec, count, address, workers=0, lease_size=1, lease_timeout=LEASE_TIMEOUT):
+    """
+    Serves the instances at address and yields pairs (index, status) as the results come.
+    workers local worker processes are started, more workers can connect by run_worker from other machines.
+    Raises RuntimeError if local workers were started and all of them have exited with no worker connected
+    while some instances have no results.
+    """
+    results = queue.Queue()
+    server = JobServer(spec, count, lease_size, lease_timeout, lambda index, status: results.put((index, status)))
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(server.start(address))
+
+    # The workers are forked before the thread of the server is started.
+    processes = [multiprocessing.Process(target=run_worker, args=(server.address,)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    thread = threading.Thread(target=loop.run_until_complete, args=(server.wait(),))
+    thread.start()
+
+    try:
+        for _ in range(count):
+            while True:
+                try:
+                    result = results.get(timeout=POLL_INTERVAL)
+                    break
+                except queue.Empty:
+                    # A worker puts its results before it exits, so they are in the queue if all have exited.
+                    if (processes and not any(process.is_alive() for process in processes)
+                            and results.empty() and server.connections == 0):
+                        raise RuntimeError("all workers have exited before all instances have results")
+            yield result
+    finally:
+        loop.call_soon_threadsafe(server.stop)
+        thread.join()
+        loop.run_until_complete(server.close())
+        loop.close()
+        for process in processes:
+            if len(server.results) < count:
+                process.terminate()
+            process.join()
+
+
+def serve_check_attack(count, n, c_bound, d_bound, p_bound, t_bound, address, workers=1, seed=None, lease_size=1,
+                       lease_timeout=LEASE_TIMEOUT, corpus=None, cache=None, timeout=None, max_products=None,
+                       window=None, cache_max_bytes=None):
+    """
+    The same as check_attack.check_attack, but the instances are attacked by workers of a job server at address
+    (see run_jobs), and the results are printed in the order they come.
+    """
+    if corpus is not None:
+        instances = CorpusReader(corpus)
+        count = len(instances) if count is None else min(count, len(instances))
+    else:
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
+            # The seed is needed to generate the instances again.
+            print("seed =", seed)
+        instances = SeededInstances(count, n, c_bound, d_bound, seed)
+    spec = make_spec(count, n, c_bound, d_bound, p_bound, t_bound, seed, corpus, cache, timeout, max_products, window,
+                     cache_max_bytes)
+
+    # The instances are generated again only to print the ones the attack didn't succeed on.
+    results = (InstanceResult(index, status, instances[index] if status != OK else None)
+               for index, status in run_jobs(spec, count, address, workers, lease_size, lease_timeout))
+    try:
+        print_results(results, count)
+    finally:
+        if corpus is not None:
+            instances.close()
+
+
+def get_job_arguments_parser():
+    """
+    Creates arguments parser with the commands serve and work.
+    """
+    parser = argparse.ArgumentParser(
+        description="""
+        The job server and the workers to check the attack on several machines.
+        """,
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser(
+        "serve",
+        parents=[get_arguments_parser(add_help=False)],
+        help="Serve the instances of check_attack.py",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        conflict_handler="resolve"
+    )
+    # The options of check_attack.py mean other things for the server.
+    serve.add_argument(
+        "--jobs",
+        help="Number of local worker processes",
+        default=1,
+        type=int
+    )
+    serve.add_argument(
+        "--batch",
+        help="Number of instances leased to a worker at once",
+        default=1,
+        type=int
+    )
+    serve.add_argument(
+        "--address",
+        help="host:port or the path of a Unix socket to listen at, port 0 is a free port for local workers only",
+        default="127.0.0.1:0"
+    )
+    serve.add_argument(
+        "--lease_timeout",
+        help="Seconds without results after which leased instances are handed out again",
+        default=LEASE_TIMEOUT,
+        type=float
+    )
+
+    work = commands.add_parser(
+        "work",
+        help="Attack the instances handed out by a job server",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    work.add_argument(
+        "address",
+        help="host:port or the path of a Unix socket of the server"
+    )
+
+    return parser
+
+
+if __name__ == "__main__":
+    parser = get_job_arguments_parser()
+    args = parser.parse_args()
+    if args.command == "work":
+        print("attacked =", run_worker(parse_address(args.address)))
+    else:
+        if args.corpus is None and None in (args.count, args.size, args.c_bound, args.d_bound):
+            parser.error("--count, --size, --c_bound and --d_bound are required without --corpus")
+        if args.stats:
+            parser.error("--stats is not supported by the job server")
+
+        serve_check_attack(args.count, args.size, args.c_bound, args.d_bound, args.p_bound, args.t_bound,
+                           parse_address(args.address), args.jobs, args.seed, args.batch, args.lease_timeout,
+                           args.corpus, args.cache, args.timeout, args.max_products, args.window,
+                           args.cache_max_bytes)
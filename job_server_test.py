@@ -0,0 +1,95 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+import check_attack
+import job_server
+
+
+def expected_statuses(spec):
+    instances = job_server.open_instances(spec)
+    return {index: check_attack.run_instance((index, instances, spec["p_bound"], spec["t_bound"], None, None,
+                                              None)).status for index in range(spec["count"])}
+
+
+class TestJobServer(unittest.TestCase):
+    def test_local_workers(self):
+        self.assertEqual(job_server.parse_address("localhost:5000"), ("localhost", 5000))
+        self.assertEqual(job_server.parse_address("/tmp/jobs.sock"), "/tmp/jobs.sock")
+        spec = job_server.make_spec(8, 3, 10, 5, 10, 10, seed=1)
+        expected = expected_statuses(spec)
+        self.assertEqual(dict(job_server.run_jobs(spec, 8, ("127.0.0.1", 0), workers=2, lease_size=3)), expected)
+        with tempfile.TemporaryDirectory() as directory:
+            address = os.path.join(directory, "jobs.sock")
+            self.assertEqual(dict(job_server.run_jobs(spec, 8, address, workers=1)), expected)
+            self.assertFalse(os.path.exists(address))
+
+    def test_lease_timeout(self):
+        spec = job_server.make_spec(4, 3, 10, 5, 10, 10, seed=2)
+
+        async def scenario():
+            server = job_server.JobServer(spec, 4, lease_size=2, lease_timeout=0.2)
+            await server.start(("127.0.0.1", 0))
+            # This worker takes a lease and never returns results.
+            reader, writer = await asyncio.open_connection(*server.address)
+            writer.write(b'{"op": "pull"}\n')
+            job = json.loads(await reader.readline())
+            attacked = asyncio.get_running_loop().run_in_executor(None, job_server.run_worker, server.address)
+            await server.wait()
+            self.assertEqual(await attacked, 4)
+            writer.close()
+            await server.close()
+            return job, server
+
+        job, server = asyncio.run(scenario())
+        self.assertEqual(job["indices"], [0, 1])
+        self.assertEqual(server.reissued, 1)
+        self.assertEqual(server.results, expected_statuses(spec))
+
+    def test_heartbeat(self):
+        spec = job_server.make_spec(2, 3, 10, 5, 10, 10, seed=3)
+
+        async def scenario():
+            server = job_server.JobServer(spec, 2, lease_size=2, lease_timeout=0.2)
+            await server.start(("127.0.0.1", 0))
+            reader, writer = await asyncio.open_connection(*server.address)
+            writer.write(b'{"op": "pull"}\n')
+            job = json.loads(await reader.readline())
+            # The lease is kept by heartbeats for longer than the lease timeout.
+            for _ in range(6):
+                await asyncio.sleep(job["heartbeat"])
+                writer.write(json.dumps({"op": "heartbeat", "lease": job["lease"]}).encode() + b"\n")
+                self.assertEqual(json.loads(await reader.readline()), {"op": "ok"})
+            other_reader, other_writer = await asyncio.open_connection(*server.address)
+            other_writer.write(b'{"op": "pull"}\n')
+            other = json.loads(await other_reader.readline())
+            reissued = server.reissued
+            writer.close()
+            other_writer.close()
+            await server.close()
+            return job, other, reissued
+
+        job, other, reissued = asyncio.run(scenario())
+        self.assertAlmostEqual(job["heartbeat"], 0.2 / 3)
+        self.assertEqual(other["op"], "wait")
+        self.assertEqual(reissued, 0)
+
+    def test_workers_exited(self):
+        # The workers fail to open the corpus and exit.
+        spec = job_server.make_spec(2, None, None, None, 10, 10, corpus=os.path.join(tempfile.gettempdir(), "none"))
+        with self.assertRaises(RuntimeError):
+            list(job_server.run_jobs(spec, 2, ("127.0.0.1", 0), workers=2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+
+After the logarithm, products over max-times and min-times become max-plus and min-plus products of floats.
+Floats decide a comparison only if the margin is larger than the accumulated rounding error,
+otherwise the caller falls back to the exact integers.
+"""
+
+import math
+import operator
+import tropical_algebra as ta
+from tropical_scaled import ScaledMatrix
+
+EPS = 1e-9
+"""The relative error allowed for logarithms, much larger than the rounding error of a long chain of products."""
+
+SCREEN_BITS = 128
+"""Integers shorter than this are compared exactly, as it's cheaper than taking logarithms."""
+
+
+def log_entry(a):
+    """
+    Returns the logarithm of a non-negative entry: -inf for 0 and inf for infty.
+    """
+    if a == ta.INFTY:
+        return math.inf
+    if a == 0:
+        return -math.inf
+    return math.log(a)
+
+
+def to_log(A):
+    """
+    Returns the matrix of logarithms of the entries of A.
+    For a ScaledMatrix the logarithms are log(scalar) + log(primitive), the entries aren't multiplied out.
+    """
+    if isinstance(A, ScaledMatrix):
+        s = math.log(A.scalar)
+        return [[log_entry(a) + s for a in row] for row in A.primitive]
+    return [[log_entry(a) for a in row] for row in A]
+
+
+def _has_infinities(L):
+    return any(math.isinf(x) for row in L for x in row)
+
+
+def mul_log_max_times(LA, LB):
+    """
+    Given the logarithms of two matrices, returns the logarithm of their product over R_max-times (max-plus).
+    """
+    cols = list(zip(*LB))
+    if not _has_infinities(LA) and not _has_infinities(cols):
+        return [[max(map(operator.add, row, col)) for col in cols] for row in LA]
+
+    def dot(row, col):
+        # 0 * infty = 0 over R_max-times, so -inf wins over inf.
+        m = -math.inf
+        for a, b in zip(row, col):
+            if a == -math.inf or b == -math.inf:
+                continue
+            if a + b > m:
+                m = a + b
+        return m
+    return [[dot(row, col) for col in cols] for row in LA]
+
+
+def mul_log_min_times(LA, LB):
+    """
+    Given the logarithms of two matrices, returns the logarithm of their product over R_min-times (min-plus).
+    """
+    cols = list(zip(*LB))
+    if not _has_infinities(LA) and not _has_infinities(cols):
+        return [[min(map(operator.add, row, col)) for col in cols] for row in LA]
+
+    def dot(row, col):
+        # infty * 0 = infty over R_min-times, so inf wins over -inf.
+        return min((a + b for a, b in zip(row, col) if a != math.inf and b != math.inf), default=math.inf)
+    return [[dot(row, col) for col in cols] for row in LA]
+
+
+def log_min(L):
+    """
+    Returns the minimum of the finite logarithms (the logarithm of matrix_utils.calc_min for positive matrices).
+    """
+    return min((x for row in L for x in row if x != math.inf), default=math.inf)
+
+
+def tolerance(x):
+    """
+    Returns the margin within which a logarithm x can't be trusted.
+    """
+    if math.isinf(x):
+        return 0.0
+    return EPS * max(1.0, abs(x))
+
+
+def compare(x, y):
+    """
+    Compares two logarithms. Returns 1 if x > y, -1 if x < y and 0 if the floats can't decide.
+    """
+    if x == y and math.isinf(x):
+        return 0
+    margin = tolerance(x) + tolerance(y)
+    if x - y > margin:
+        return 1
+    if y - x > margin:
+        return -1
+    return 0
+
+
+class DualMatrix:
+    """
+    An exact matrix together with the logarithms of its entries.
+    The logarithms are computed on demand, and the exact matrix can be None if only the logarithms are known.
+    """
+
+    def __init__(self, exact=None, log=None):
+        self.exact = exact
+        self._log = log
+
+    @property
+    def log(self):
+        if self._log is None:
+            self._log = to_log(self.exact)
+        return self._log
+
+
+def min_product_exceeds(A, B, bound, semiring):
+    """
+    Screens the test calc_min(A * B) > bound for DualMatrix A and B over R_max-times or R_min-times.
+    Returns True or False if the logarithms decide the test and None otherwise.
+    """
+    mul = mul_log_max_times if semiring is ta.MAX_TIMES else mul_log_min_times
+    result = compare(log_min(mul(A.log, B.log)), log_entry(bound))
+    if result == 0:
+        return None
+    return result > 0
+
+
+def find_t_coeff(A, B, scale=1):
+    """
+    Returns the same value as attack.find_t_coeff: max(A / (scale B)) if it is an integer, infty otherwise.
+    The maximum is found on logarithms, and only the entries within the float margin of it are compared exactly.
+    Returns None if the matrices are not positive, then the exact function has to be used.
+    """
+    ratios = []
+    for row_a, row_b in zip(A, B):
+        for a, b in zip(row_a, row_b):
+            if a == ta.INFTY or b == ta.INFTY or a <= 0 or b <= 0:
+                return None
+            ratios.append((math.log(a) - math.log(b), a, b))
+
+    top = max(r for r, _, _ in ratios)
+    a = b = None
+    for r, x, y in ratios:
+        if compare(r, top) < 0:
+            continue
+        if a is None or x * b > y * a:
+            a, b = x, y
+    # The positive scale doesn't change where the maximum is.
+    b *= scale
+    if a % b == 0:
+        return a // b
+    return ta.INFTY
@@ -0,0 +1,74 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import random
+import unittest
+import attack
+import log_domain
+import tropical_algebra as ta
+import tropical_scaled
+from log_domain import DualMatrix
+from matrix_utils import calc_min
+
+
+def generate_big_matrix(n, bits):
+    return [[random.randint(1, 2 ** bits) for _ in range(n)] for _ in range(n)]
+
+
+class TestLogDomain(unittest.TestCase):
+    def test_compare(self):
+        self.assertEqual(log_domain.compare(2.0, 1.0), 1)
+        self.assertEqual(log_domain.compare(1.0, 2.0), -1)
+        self.assertEqual(log_domain.compare(1000.0, 1000.0 + 1e-12), 0)
+        self.assertEqual(log_domain.compare(float("inf"), float("inf")), 0)
+
+    def test_min_product_exceeds(self):
+        random.seed(13)
+        for _ in range(50):
+            A = generate_big_matrix(4, 300)
+            B = generate_big_matrix(4, 300)
+            for semiring in (ta.MAX_TIMES, ta.MIN_TIMES):
+                m = calc_min(semiring.mul_matrices(A, B))
+                for bound in (m - 1, m, m + 1, m // 2, m * 2):
+                    result = log_domain.min_product_exceeds(DualMatrix(A), DualMatrix(B), bound, semiring)
+                    if result is not None:
+                        self.assertEqual(result, m > bound)
+                self.assertTrue(log_domain.min_product_exceeds(DualMatrix(A), DualMatrix(B), m // 2, semiring))
+
+    def test_find_t_coeff(self):
+        random.seed(13)
+        for _ in range(100):
+            B = generate_big_matrix(4, 300)
+            t = random.randint(1, 2 ** 20)
+            A = [[b * t - random.randint(0, 1) for b in row] for row in B]
+            A[random.randrange(4)][random.randrange(4)] = B[0][0] * t if random.randint(0, 1) else A[0][0]
+            expected = None
+            for row_a, row_b in zip(A, B):
+                for a, b in zip(row_a, row_b):
+                    if expected is None or a * expected[1] > expected[0] * b:
+                        expected = (a, b)
+            expected = expected[0] // expected[1] if expected[0] % expected[1] == 0 else ta.INFTY
+            self.assertEqual(log_domain.find_t_coeff(A, B), expected)
+            self.assertEqual(attack.find_t_coeff(A, B), expected)
+            # The same with B given as scalar * primitive.
+            B = tropical_scaled.ScaledMatrix.normalize([[b * 6 for b in row] for row in B])
+            self.assertEqual(attack.find_t_coeff(A, B.primitive, B.scalar // 6), expected)
+            self.assertEqual(log_domain.find_t_coeff(A, B.primitive, B.scalar // 6), expected)
+
+    def test_scaled_log(self):
+        A = tropical_scaled.ScaledMatrix(2 ** 400 + 1, [[3, 0], [ta.INFTY, 2 ** 200]])
+        for row, expected in zip(log_domain.to_log(A), log_domain.to_log(A.tolist())):
+            for x, y in zip(row, expected):
+                self.assertEqual(log_domain.compare(x, y), 0)
+        self.assertTrue(attack._is_large(A))
+        self.assertFalse(attack._is_large(tropical_scaled.ScaledMatrix(3, [[5]])))
+
+
+if __name__ == "__main__":
+    unittest.main()
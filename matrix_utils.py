@@ -7,25 +7,31 @@ AIP, 2014].
 I. Buchinskiy, M. Kotov, A. Treier, 2022
 """
 
+import math
 import tropical_algebra as ta
+from power_cache import PowerTableCache
+from product_view import ProductView
+from tropical_scaled import ScaledMatrix
+
+power_cache = PowerTableCache()
+"""The cache of power tables shared by all calls of calc_triple_product."""
 
 
 def calc_min(A):
     """
     Computes the minimum of the elements of the matrix.
     """
-    n = len(A)
     m = A[0][0]
-    for i in range(n):
-        for j in range(n):
+    for row in A:
+        for a in row:
             if m == 0:
                 return m
             if m == ta.INFTY:
-                m = A[i][j]
-            if A[i][j] == ta.INFTY:
+                m = a
+            if a == ta.INFTY:
                 continue
-            if A[i][j] < m:
-                m = A[i][j]
+            if a < m:
+                m = a
     return m
 
 
@@ -33,14 +39,13 @@ def calc_max(A):
     """
     Computes the maximum of the elements of the matrix.
     """
-    n = len(A)
     m = A[0][0]
-    for i in range(n):
-        for j in range(n):
-            if m == ta.INFTY or A[i][j] == ta.INFTY:
+    for row in A:
+        for a in row:
+            if m == ta.INFTY or a == ta.INFTY:
                 return ta.INFTY
-            if A[i][j] > m:
-                m = A[i][j]
+            if a > m:
+                m = a
     return m
 
 
@@ -50,6 +55,72 @@ def calc_triple_product(M, N, X, p, t):
     """
     return ta.mul_matrices_min_times(
         ta.mul_matrices_max_times(
-            ta.calc_poly_matrix_max_times(M, p),
+            power_cache.calc_poly_matrix(M, p, ta.MAX_TIMES),
             X),
-        ta.calc_poly_matrix_min_times(N, t))
+        power_cache.calc_poly_matrix(N, t, ta.MIN_TIMES))
+
+
+def triple_product_view(M, N, X, p, t):
+    """
+    Returns (p(M) boxtimes X) otimes t(N) as a ProductView, the rows of both products are computed on demand.
+    """
+    MpX = ProductView(ta.MAX_TIMES, power_cache.calc_poly_matrix(M, p, ta.MAX_TIMES), X)
+    return ProductView(ta.MIN_TIMES, MpX, power_cache.calc_poly_matrix(N, t, ta.MIN_TIMES))
+
+
+def projective_fingerprint(A):
+    """
+    Returns a hashable fingerprint of the matrix up to a non-zero const: finite non-zero entries are divided
+    by their gcd (with the sign of the first of them), zeros and infinities are kept as is.
+    Two matrices have the same fingerprint iff is_matrix_div_matrix_const returns a const for them.
+    Returns None if the matrix has no finite non-zero entries.
+    """
+    if isinstance(A, ScaledMatrix):
+        A = A.primitive
+    finite = [a for row in A for a in row if a != 0 and a != ta.INFTY]
+    if not finite:
+        return None
+    g = math.gcd(*finite)
+    if finite[0] < 0:
+        g = -g
+    return tuple(tuple(a if a == 0 or a == ta.INFTY else a // g for a in row) for row in A)
+
+
+class RepetitionIndex:
+    """
+    A hash index of projective fingerprints of matrices, it detects that a matrix is const * some earlier matrix.
+    If matrices is given, it is a sequence (e.g. a power_store.PowerStore) whose k-th element is the k-th matrix
+    added to the index. Then only hashes of the fingerprints are kept, and a hash collision is resolved by
+    comparing with the fingerprint of the matrix from the sequence.
+    """
+
+    def __init__(self, matrices=None):
+        self._fingerprints = set()
+        self._hashes = {}
+        self._matrices = matrices
+        self._count = 0
+
+    def __len__(self):
+        """
+        Returns the number of matrices added to the index.
+        """
+        return self._count
+
+    def add(self, A):
+        """
+        Adds a matrix to the index. Returns True iff A is const * some matrix added before.
+        """
+        self._count += 1
+        fingerprint = projective_fingerprint(A)
+        if fingerprint is None:
+            return False
+        if self._matrices is not None:
+            positions = self._hashes.setdefault(hash(fingerprint), [])
+            if any(projective_fingerprint(self._matrices[k]) == fingerprint for k in positions):
+                return True
+            positions.append(self._count - 1)
+            return False
+        if fingerprint in self._fingerprints:
+            return True
+        self._fingerprints.add(fingerprint)
+        return False
@@ -0,0 +1,177 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+
+The sequence of powers of a matrix over max-times (min-times) is eventually periodic up to a const:
+A^(k + rho) = c * A^k for all k >= T. After the logarithm, max-times becomes max-plus (and min-times becomes
+max-plus with negated weights), where the period divides the cyclicity of the critical graph, i.e. the graph of
+the cycles with the maximum mean weight. The cyclicity is computed in floating point and then the transient T
+and the period rho are found and verified with exact matrix products.
+"""
+
+import math
+import tropical_algebra as ta
+from matrix_utils import projective_fingerprint
+
+EPS = 1e-9
+"""The relative tolerance used to compare weights of cycles."""
+
+
+def log_weights(A, semiring):
+    """
+    Returns the weights of the digraph of A in max-plus: log(a) over max-times and -log(a) over min-times,
+    None stands for the missing edges (zeros of the semiring).
+    Returns None if A has entries which are infinite after the logarithm (infty over max-times, 0 over min-times).
+    """
+    n = len(A)
+    W = [[None] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(n):
+            a = A[i][j]
+            if a == semiring.zero_element():
+                continue
+            if a == ta.INFTY or a <= 0:
+                return None
+            W[i][j] = math.log(a) if semiring is ta.MAX_TIMES else -math.log(a)
+    return W
+
+
+def max_cycle_mean(W):
+    """
+    Returns the maximum mean weight of a cycle of the digraph with weights W (Karp's algorithm).
+    Returns None if the digraph has no cycles.
+    """
+    n = len(W)
+    # D[k][v] is the maximum weight of a walk with k edges ending at v.
+    D = [[0.0] * n]
+    for k in range(1, n + 1):
+        prev = D[-1]
+        D.append([max((prev[u] + W[u][v] for u in range(n) if prev[u] is not None and W[u][v] is not None),
+                      default=None) for v in range(n)])
+
+    result = None
+    for v in range(n):
+        if D[n][v] is None:
+            continue
+        mean = min((D[n][v] - D[k][v]) / (n - k) for k in range(n) if D[k][v] is not None)
+        if result is None or mean > result:
+            result = mean
+    return result
+
+
+def critical_graph(W, lam):
+    """
+    Returns the adjacency lists of the critical graph: the edges lying on cycles with the mean weight lam.
+    """
+    n = len(W)
+    eps = EPS * (1 + max((abs(w) for row in W for w in row if w is not None), default=0))
+    # S[u][v] is the maximum weight of a path from u to v with at least one edge and weights w - lam.
+    S = [[None if w is None else w - lam for w in row] for row in W]
+    for k in range(n):
+        for u in range(n):
+            if S[u][k] is None:
+                continue
+            for v in range(n):
+                if S[k][v] is not None and (S[u][v] is None or S[u][k] + S[k][v] > S[u][v]):
+                    S[u][v] = S[u][k] + S[k][v]
+
+    critical = [S[v][v] is not None and S[v][v] >= -eps for v in range(n)]
+    adj = [[] for _ in range(n)]
+    for u in range(n):
+        for v in range(n):
+            if critical[u] and critical[v] and W[u][v] is not None and S[v][u] is not None \
+                    and W[u][v] - lam + S[v][u] >= -eps:
+                adj[u].append(v)
+    return adj
+
+
+def cyclicity(adj):
+    """
+    Returns the cyclicity of a graph whose components are strongly connected:
+    the lcm over the components of the gcd of the lengths of their cycles.
+    """
+    n = len(adj)
+    level = [None] * n
+    result = 1
+    for root in range(n):
+        if level[root] is not None or not adj[root]:
+            continue
+        level[root] = 0
+        stack = [root]
+        component = []
+        while stack:
+            u = stack.pop()
+            component.append(u)
+            for v in adj[u]:
+                if level[v] is None:
+                    level[v] = level[u] + 1
+                    stack.append(v)
+        g = 0
+        for u in component:
+            for v in adj[u]:
+                g = math.gcd(g, level[u] + 1 - level[v])
+        result = result * g // math.gcd(result, g)
+    return result
+
+
+def _is_periodic_from(semiring, P, As):
+    """
+    Returns True iff P * As = c * P for some const c.
+    """
+    fingerprint = projective_fingerprint(P)
+    return fingerprint is not None and fingerprint == projective_fingerprint(semiring.mul_matrices(P, As))
+
+
+def predict_periodicity(A, semiring, bound):
+    """
+    Returns a pair (T, rho) such that A^(k + rho) = c * A^k for all k >= T with T and rho minimal.
+    T + rho is the first power of A which is a const times an earlier power.
+    Returns None if T > bound or if the cyclicity can't be found (the digraph of A has no cycles,
+    A has infinite entries after the logarithm, or A is not eventually periodic with the predicted period).
+    """
+    W = log_weights(A, semiring)
+    if W is None:
+        return None
+    lam = max_cycle_mean(W)
+    if lam is None:
+        return None
+    sigma = cyclicity(critical_graph(W, lam))
+    As = semiring.pwr_matrix(A, sigma)
+
+    # The property "A^k * A^sigma = c * A^k" is monotone in k, so T is found by a galloping search.
+    P = semiring.one_matrix(len(A))
+    steps = [A]
+    if _is_periodic_from(semiring, P, As):
+        hi, P_hi = 0, P
+    else:
+        lo, P_lo = 0, P
+        while True:
+            P = semiring.mul_matrices(P_lo, steps[-1])
+            step = 2 ** (len(steps) - 1)
+            if _is_periodic_from(semiring, P, As):
+                hi, P_hi = lo + step, P
+                break
+            lo, P_lo = lo + step, P
+            if lo >= bound:
+                return None
+            steps.append(semiring.mul_matrices(steps[-1], steps[-1]))
+        # Binary search in (lo, hi], hi - lo is a power of two.
+        b = len(steps) - 1
+        while hi - lo > 1:
+            b -= 1
+            P = semiring.mul_matrices(P_lo, steps[b])
+            if _is_periodic_from(semiring, P, As):
+                hi, P_hi = lo + 2 ** b, P
+            else:
+                lo, P_lo = lo + 2 ** b, P
+
+    if hi > bound:
+        return None
+    for rho in range(1, sigma + 1):
+        if sigma % rho == 0 and _is_periodic_from(semiring, P_hi, semiring.pwr_matrix(A, rho)):
+            return hi, rho
+    return None
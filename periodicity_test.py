@@ -0,0 +1,63 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import math
+import random
+import unittest
+import tropical_algebra as ta
+import periodicity
+from matrix_utils import RepetitionIndex
+
+
+def first_repeated_power(A, semiring, bound):
+    """
+    Returns the first i such that A^i = c * A^j for some j < i, or None if i > bound.
+    """
+    index = RepetitionIndex()
+    P = semiring.one_matrix(len(A))
+    for i in range(bound + 1):
+        if index.add(P):
+            return i
+        P = semiring.mul_matrices(P, A)
+    return None
+
+
+class TestPeriodicity(unittest.TestCase):
+    def test_max_cycle_mean(self):
+        W = [[None, math.log(2)], [math.log(8), None]]
+        self.assertAlmostEqual(math.log(4), periodicity.max_cycle_mean(W))
+        self.assertIsNone(periodicity.max_cycle_mean([[None, 1.0], [None, None]]))
+
+    def test_cyclicity(self):
+        A = [[0, 2, 0], [0, 0, 3], [5, 0, 0]]
+        W = periodicity.log_weights(A, ta.MAX_TIMES)
+        self.assertEqual(3, periodicity.cyclicity(periodicity.critical_graph(W, periodicity.max_cycle_mean(W))))
+        self.assertEqual((0, 3), periodicity.predict_periodicity(A, ta.MAX_TIMES, 100))
+
+    def test_against_brute_force(self):
+        random.seed(1)
+        for _ in range(300):
+            n = random.randint(1, 4)
+            u = random.choice([2, 3, 5, 10])
+            semiring = random.choice([ta.MAX_TIMES, ta.MIN_TIMES])
+            A = [[random.randint(1, u) for j in range(n)] for i in range(n)]
+            if random.random() < 0.3:
+                for _ in range(n):
+                    A[random.randrange(n)][random.randrange(n)] = semiring.zero_element()
+            expected = first_repeated_power(A, semiring, 100)
+            result = periodicity.predict_periodicity(A, semiring, 100)
+            if result is not None:
+                self.assertEqual(expected, sum(result))
+            else:
+                # No prediction, then the powers don't repeat up to the bound either.
+                self.assertIsNone(expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import sys
+import tropical_algebra as ta
+from collections import OrderedDict
+
+
+def matrix_size(A):
+    """
+    Returns an estimate of the memory used by a matrix in bytes.
+    """
+    if isinstance(A, ta.TropicalMatrix):
+        return sys.getsizeof(A) + sys.getsizeof(A.data) + sum(map(sys.getsizeof, A.data))
+    return sys.getsizeof(A) + sum(sys.getsizeof(row) + sum(map(sys.getsizeof, row)) for row in A)
+
+
+def poly_degree(p, semiring):
+    """
+    Returns the largest power with a non-zero coefficient in the polynomial p over the semiring, 0 if there is none.
+    """
+    d = len(p) - 1
+    zero = semiring.zero_element()
+    return max((d - i for i in range(d + 1) if p[i] != zero), default=0)
+
+
+def combine_powers(table, p, semiring):
+    """
+    Returns the sum of p[i] * table[d - i] over the semiring, where d = len(p) - 1, i.e. p(A) for the power
+    table A^0, A^1, ... of a matrix A. Only additions and multiplications by coefficients are used,
+    so table can also hold the matrices A^k * Y for a fixed Y, and then the result is p(A) * Y.
+    """
+    d = len(p) - 1
+    zero = semiring.zero_element()
+    C = None
+    for i in range(d + 1):
+        if p[i] == zero:
+            continue
+        if C is None:
+            C = semiring.mul_matrix_by_coef(table[d - i], p[i])
+        else:
+            C = semiring.add_scaled_matrix(C, table[d - i], p[i])
+
+    if C is None:
+        return semiring.zero_matrix(len(table[0]))
+    return C
+
+
+class PowerTableCache:
+    """
+    A bounded LRU cache of power tables A^0, A^1, ..., A^d keyed by the value of A and the semiring.
+    A table is extended incrementally when a higher power is requested.
+    max_bytes bounds the estimated memory used by all tables, least recently used tables are evicted first.
+    """
+
+    def __init__(self, max_bytes=64 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._tables = OrderedDict()
+        self._sizes = {}
+        self.hits = 0
+        self.misses = 0
+        self.extensions = 0
+        self.evictions = 0
+        self.products = 0
+
+    def __len__(self):
+        return len(self._tables)
+
+    def clear(self):
+        """
+        Removes all tables, statistics are kept.
+        """
+        self._tables.clear()
+        self._sizes.clear()
+        self.total_bytes = 0
+
+    def stats(self):
+        """
+        Returns the hit/miss statistics of the cache.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "extensions": self.extensions,
+            "evictions": self.evictions,
+            "products": self.products,
+            "tables": len(self._tables),
+            "bytes": self.total_bytes,
+        }
+
+    def powers(self, A, semiring, d):
+        """
+        Returns a list of at least d + 1 matrices A^0, A^1, ..., A^d over the semiring.
+        The list is shared with the cache and must not be modified.
+        """
+        key = (semiring, tuple(map(tuple, A)))
+        table = self._tables.get(key)
+        if table is None:
+            self.misses += 1
+            table = [semiring.one_matrix(len(A))]
+            self._sizes[key] = matrix_size(table[0])
+        elif len(table) > d:
+            self.hits += 1
+            self._tables.move_to_end(key)
+            return table
+        else:
+            self.extensions += 1
+            del self._tables[key]
+            self.total_bytes -= self._sizes[key]
+
+        while len(table) <= d:
+            table.append(semiring.mul_matrices(table[-1], A))
+            self._sizes[key] += matrix_size(table[-1])
+            self.products += 1
+
+        self._store(key, table)
+        return table
+
+    def calc_poly_matrix(self, A, p, semiring):
+        """
+        Given a matrix A and a polynomial p over the semiring. Returns p(A) computed from the power table of A.
+        """
+        table = self.powers(A, semiring, poly_degree(p, semiring))
+        C = combine_powers(table, p, semiring)
+        if isinstance(A, ta.TropicalMatrix) and not isinstance(C, ta.TropicalMatrix):
+            return ta.TropicalMatrix(C)
+        return C
+
+    def _store(self, key, table):
+        size = self._sizes[key]
+        if size > self.max_bytes:
+            del self._sizes[key]
+            return
+        self._tables[key] = table
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            old_key, _ = self._tables.popitem(last=False)
+            self.total_bytes -= self._sizes.pop(old_key)
+            self.evictions += 1
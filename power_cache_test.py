@@ -0,0 +1,60 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import unittest
+import tropical_algebra as ta
+from power_cache import PowerTableCache, matrix_size
+
+
+class TestPowerTableCache(unittest.TestCase):
+    def test_calc_poly_matrix(self):
+        cache = PowerTableCache()
+        M = [[5, 7, 1], [4, 2, 3], [2, 5, 6]]
+        N = [[2, 1, 3], [7, 5, 4], [3, 1, 9]]
+        p = [1, 5, 10, 0]
+        t = [3, 1, ta.INFTY]
+        r = [10, ta.INFTY, 1, ta.INFTY, ta.INFTY]
+        self.assertEqual(ta.calc_poly_matrix_max_times(M, p), cache.calc_poly_matrix(M, p, ta.MAX_TIMES))
+        self.assertEqual(ta.calc_poly_matrix_min_times(N, t), cache.calc_poly_matrix(N, t, ta.MIN_TIMES))
+        self.assertEqual(ta.calc_poly_matrix_min_times(N, r), cache.calc_poly_matrix(N, r, ta.MIN_TIMES))
+        self.assertEqual(ta.calc_poly_matrix_max_times(M, [ta.INFTY, 0]),
+                         cache.calc_poly_matrix(M, [ta.INFTY, 0], ta.MAX_TIMES))
+        self.assertEqual(ta.zero_matrix_max_times(3), cache.calc_poly_matrix(M, [0, 0], ta.MAX_TIMES))
+
+    def test_statistics(self):
+        cache = PowerTableCache()
+        M = [[1, 2], [3, 4]]
+        table = cache.powers(M, ta.MAX_TIMES, 3)
+        self.assertEqual([ta.pwr_matrix_max_times(M, i) for i in range(4)], table)
+        cache.powers(M, ta.MAX_TIMES, 2)
+        cache.powers(M, ta.MAX_TIMES, 5)
+        cache.powers(M, ta.MIN_TIMES, 1)
+        stats = cache.stats()
+        self.assertEqual(1, stats["hits"])
+        self.assertEqual(2, stats["misses"])
+        self.assertEqual(1, stats["extensions"])
+        self.assertEqual(6, stats["products"])
+        self.assertEqual(2, stats["tables"])
+
+    def test_eviction(self):
+        M = [[1, 2], [3, 4]]
+        N = [[5, 6], [7, 8]]
+        size = sum(matrix_size(ta.pwr_matrix_max_times(M, i)) for i in range(3))
+        cache = PowerTableCache(size)
+        cache.powers(M, ta.MAX_TIMES, 2)
+        cache.powers(N, ta.MAX_TIMES, 2)
+        self.assertEqual(1, len(cache))
+        self.assertEqual(1, cache.stats()["evictions"])
+        self.assertLessEqual(cache.total_bytes, cache.max_bytes)
+        cache.powers(M, ta.MAX_TIMES, 2)
+        self.assertEqual(3, cache.stats()["misses"])
+
+
+if __name__ == "__main__":
+    unittest.main()
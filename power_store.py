@@ -0,0 +1,122 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import mmap
+import tempfile
+from collections import OrderedDict
+from entry_codec import read_entry, read_varint, write_entry, write_varint
+from tropical_scaled import ScaledMatrix
+
+_PLAIN = 0
+_SCALED = 1
+
+
+def encode_matrix(out, A):
+    """
+    Appends a matrix (a list of lists, a TropicalMatrix or a ScaledMatrix) to the bytearray out.
+    """
+    if isinstance(A, ScaledMatrix):
+        out.append(_SCALED)
+        write_varint(out, len(A))
+        write_entry(out, A.scalar)
+        A = A.primitive
+    else:
+        out.append(_PLAIN)
+        write_varint(out, len(A))
+    for row in A:
+        for a in row:
+            write_entry(out, a)
+
+
+def decode_matrix(buf, pos):
+    """
+    Reads a matrix written by encode_matrix from buf at pos. Returns a list of lists or a ScaledMatrix.
+    """
+    kind = buf[pos]
+    n, pos = read_varint(buf, pos + 1)
+    if kind == _SCALED:
+        scalar, pos = read_entry(buf, pos)
+    A = []
+    for _ in range(n):
+        row = []
+        for _ in range(n):
+            a, pos = read_entry(buf, pos)
+            row.append(a)
+        A.append(row)
+    if kind == _SCALED:
+        return ScaledMatrix(scalar, A)
+    return A
+
+
+class PowerStore:
+    """
+    An append-only list of matrices (powers of a matrix) which keeps only the last window matrices in memory.
+    Every matrix is written to an anonymous temporary file when it is appended, and older matrices are read
+    back from the memory-mapped file on access, so the memory doesn't grow with the number of powers.
+    A pickled store contains all its matrices, and unpickling writes them to a new file.
+    """
+
+    def __init__(self, window=16, matrices=()):
+        self.window = window
+        self._file = tempfile.TemporaryFile()
+        self._offsets = []
+        self._size = 0
+        self._map = None
+        self._recent = OrderedDict()
+        for A in matrices:
+            self.append(A)
+
+    def __reduce__(self):
+        return PowerStore, (self.window, list(self))
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def append(self, A):
+        out = bytearray()
+        encode_matrix(out, A)
+        self._file.seek(self._size)
+        self._file.write(out)
+        self._offsets.append(self._size)
+        self._size += len(out)
+        self._recent[len(self._offsets) - 1] = A
+        while len(self._recent) > self.window:
+            self._recent.popitem(last=False)
+
+    def __getitem__(self, j):
+        if j < 0:
+            j += len(self._offsets)
+        if not 0 <= j < len(self._offsets):
+            raise IndexError("power index out of range")
+        A = self._recent.get(j)
+        if A is not None:
+            return A
+        end = self._offsets[j + 1] if j + 1 < len(self._offsets) else self._size
+        if self._map is None or len(self._map) < end:
+            self._remap()
+        return decode_matrix(self._map, self._offsets[j])
+
+    def __iter__(self):
+        for j in range(len(self._offsets)):
+            yield self[j]
+
+    def _remap(self):
+        self._file.flush()
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), self._size, access=mmap.ACCESS_READ)
+
+    def close(self):
+        """
+        Frees the file, the store can't be used after that.
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
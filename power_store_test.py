@@ -0,0 +1,52 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import pickle
+import unittest
+import matrix_utils
+import power_store
+import tropical_algebra as ta
+import tropical_scaled as tsc
+
+
+class TestPowerStore(unittest.TestCase):
+    def test_store(self):
+        M = [[5, 7, 1], [4, 2, ta.INFTY], [-2, 0, 3 ** 50]]
+        powers = [tsc.MIN_TIMES.one_matrix(3), M]
+        for _ in range(10):
+            powers.append(tsc.MIN_TIMES.mul_matrices(powers[-1], M))
+        store = power_store.PowerStore(3)
+        for A in powers:
+            store.append(A)
+            self.assertEqual(store[0], powers[0])
+        self.assertEqual(len(store), len(powers))
+        self.assertEqual(list(store), powers)
+        self.assertEqual(store[-1], powers[-1])
+        self.assertIsInstance(store[1], list)
+        self.assertIsInstance(store[5], tsc.ScaledMatrix)
+        self.assertRaises(IndexError, store.__getitem__, len(powers))
+        copy = pickle.loads(pickle.dumps(store))
+        self.assertEqual(list(copy), powers)
+        self.assertEqual(copy.window, 3)
+        store.close()
+        copy.close()
+
+    def test_repetition_index(self):
+        M = [[5, 7, 1], [4, 2, 3], [2, 5, 6]]
+        store = power_store.PowerStore(0)
+        index = matrix_utils.RepetitionIndex(store)
+        for A, repeated in [(M, False), (ta.mul_matrices_max_times(M, M), False),
+                            (ta.mul_matrix_by_coef_max_times(M, 6), True), ([[0] * 3] * 3, False)]:
+            store.append(A)
+            self.assertEqual(index.add(A), repeated)
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import instrumentation
+import tropical_algebra as ta
+
+
+class ProductView:
+    """
+    The product A * B over a semiring whose rows are computed on demand, in row order, and kept.
+    A can be a ProductView as well, then only the rows of it which are needed are computed.
+    Tests stop as soon as their outcome is decided, so a failed test costs a few rows of the product (O(n^2))
+    instead of the whole product, and the rows computed by a test are reused if the product is needed later.
+    """
+
+    def __init__(self, semiring, A, B):
+        self.A = A
+        self.n = len(A)
+        self._row_product = semiring._row_kernel(B)
+        self._rows = []
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        while len(self._rows) <= i:
+            self._rows.append(self._row_product(self.A[len(self._rows)]))
+            instrumentation.count("element_ops", 2 * self.n ** 2)
+            if len(self._rows) == self.n:
+                instrumentation.count("matrix_products")
+                instrumentation.count("matrices_allocated")
+        return self._rows[i]
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield self[i]
+
+    def rows_computed(self):
+        """
+        Returns the number of rows computed so far.
+        """
+        return len(self._rows)
+
+    def matrix(self):
+        """
+        Computes the remaining rows and returns the product, a TropicalMatrix if A is one, a list of lists otherwise.
+        """
+        rows = list(self)
+        if isinstance(self.A, ta.TropicalMatrix):
+            return ta.TropicalMatrix(rows)
+        return rows
+
+    def equals(self, C):
+        """
+        Returns True iff the product equals the matrix C, stops at the first row with a mismatch.
+        """
+        if len(C) != self.n:
+            return False
+        for i in range(self.n):
+            if self[i] != list(C[i]):
+                return False
+        return True
+
+    def min_exceeds(self, bound):
+        """
+        Returns calc_min(A * B) > bound, i.e. True iff all finite entries are greater than bound.
+        Stops at the first row with an entry not greater than bound.
+        """
+        for row in self:
+            for a in row:
+                if a != ta.INFTY and a <= bound:
+                    return False
+        return True
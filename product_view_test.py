@@ -0,0 +1,61 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import random
+import unittest
+import matrix_utils
+import tropical_algebra as ta
+from product_view import ProductView
+
+
+def generate_matrix(n, infty_rate=0.0):
+    return [[ta.INFTY if random.random() < infty_rate else random.randint(0, 20) for _ in range(n)]
+            for _ in range(n)]
+
+
+class TestProductView(unittest.TestCase):
+    def test_rows(self):
+        random.seed(20)
+        for _ in range(50):
+            A = generate_matrix(5, 0.2)
+            B = generate_matrix(5, 0.2)
+            for semiring in (ta.MAX_TIMES, ta.MIN_TIMES):
+                view = ProductView(semiring, A, B)
+                self.assertEqual(view[2], semiring.mul_matrices(A, B)[2])
+                self.assertEqual(view.rows_computed(), 3)
+                self.assertEqual(view.matrix(), semiring.mul_matrices(A, B))
+                self.assertEqual(ProductView(semiring, ta.TropicalMatrix(A), B).matrix(),
+                                 ta.TropicalMatrix(semiring.mul_matrices(A, B)))
+
+    def test_early_termination(self):
+        random.seed(20)
+        A = generate_matrix(6)
+        B = generate_matrix(6)
+        C = ta.mul_matrices_min_times(A, B)
+        view = ProductView(ta.MIN_TIMES, A, B)
+        wrong = [row[:] for row in C]
+        wrong[0][0] += 1
+        self.assertFalse(view.equals(wrong))
+        self.assertEqual(view.rows_computed(), 1)
+        self.assertTrue(view.equals(C))
+
+        view = ProductView(ta.MIN_TIMES, A, B)
+        self.assertFalse(view.min_exceeds(max(C[0])))
+        self.assertEqual(view.rows_computed(), 1)
+        self.assertEqual(view.min_exceeds(matrix_utils.calc_min(C) - 1), True)
+
+    def test_triple_product_view(self):
+        M, N, X = generate_matrix(3), generate_matrix(3), generate_matrix(3)
+        p, t = [1, 5, 0], [2, ta.INFTY, 3]
+        view = matrix_utils.triple_product_view(M, N, X, p, t)
+        self.assertEqual(view.matrix(), matrix_utils.calc_triple_product(M, N, X, p, t))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import tropical_algebra as ta
+from generate_instance import Instance, generate_random_matrix, generate_random_max_poly, \
+    generate_random_min_poly
+from power_cache import combine_powers, poly_degree
+
+
+class ProtocolSession:
+    """
+    The protocol with fixed public matrices M, N and X. The powers M^i, N^j and the products M^i boxtimes X
+    are computed once and extended when a polynomial of a larger degree comes, then a public key
+    (p(M) boxtimes X) otimes t(N) takes one matrix product instead of evaluating the polynomials and two products:
+    p(M) boxtimes X = sum_i p_i (M^i boxtimes X), since the coefficients are non-negative.
+    The results are the same as the ones of matrix_utils.calc_triple_product.
+    """
+
+    def __init__(self, M, N, X):
+        self.M = M
+        self.N = N
+        self.X = X
+        self.n = len(M)
+        self.Mi = [ta.MAX_TIMES.one_matrix(self.n)]
+        self.MiX = [X]
+        self.Nj = [ta.MIN_TIMES.one_matrix(self.n)]
+
+    def extend(self, p_degree, t_degree):
+        """
+        Computes the tables up to M^p_degree and N^t_degree.
+        """
+        while len(self.Mi) <= p_degree:
+            self.Mi.append(ta.MAX_TIMES.mul_matrices(self.Mi[-1], self.M))
+            self.MiX.append(ta.MAX_TIMES.mul_matrices(self.Mi[-1], self.X))
+        while len(self.Nj) <= t_degree:
+            self.Nj.append(ta.MIN_TIMES.mul_matrices(self.Nj[-1], self.N))
+
+    def _polys(self, p, t):
+        """
+        Returns p(M) and t(N) computed from the tables.
+        """
+        self.extend(poly_degree(p, ta.MAX_TIMES), poly_degree(t, ta.MIN_TIMES))
+        return combine_powers(self.Mi, p, ta.MAX_TIMES), combine_powers(self.Nj, t, ta.MIN_TIMES)
+
+    def public_key(self, p, t):
+        """
+        Returns (p(M) boxtimes X) otimes t(N).
+        """
+        self.extend(poly_degree(p, ta.MAX_TIMES), poly_degree(t, ta.MIN_TIMES))
+        MpX = combine_powers(self.MiX, p, ta.MAX_TIMES)
+        return ta.MIN_TIMES.mul_matrices(MpX, combine_powers(self.Nj, t, ta.MIN_TIMES))
+
+    def shared_key(self, p, t, B):
+        """
+        Returns the key (p(M) boxtimes B) otimes t(N) for the secret polynomials p, t and the other side's public key B.
+        """
+        Mp, Nt = self._polys(p, t)
+        return ta.MIN_TIMES.mul_matrices(ta.MAX_TIMES.mul_matrices(Mp, B), Nt)
+
+    def public_keys(self, secrets):
+        """
+        Returns the public keys for a list of pairs (p, t).
+        """
+        secrets = list(secrets)
+        self._extend_for(secrets)
+        return [self.public_key(p, t) for p, t in secrets]
+
+    def shared_keys(self, secrets, keys):
+        """
+        Returns the shared keys for a list of pairs (p, t) and the list of public keys B of the other side.
+        """
+        secrets = list(secrets)
+        self._extend_for(secrets)
+        return [self.shared_key(p, t, B) for (p, t), B in zip(secrets, keys)]
+
+    def _extend_for(self, secrets):
+        # The tables are extended once for the largest degrees of the list.
+        self.extend(max((poly_degree(p, ta.MAX_TIMES) for p, _ in secrets), default=0),
+                    max((poly_degree(t, ta.MIN_TIMES) for _, t in secrets), default=0))
+
+    def generate_instance(self, u, d):
+        """
+        Generates a random instance of the protocol with the public matrices of the session,
+        like generate_instance.generate_random_instance does for random public matrices.
+        """
+        while True:
+            result = Instance()
+            result.M = self.M
+            result.N = self.N
+            result.X = self.X
+            result.p = generate_random_max_poly(d, 1, u, 0.5)
+            result.t = generate_random_min_poly(d, 1, u, 0.5)
+            result.q = generate_random_max_poly(d, 1, u, 0.5)
+            result.r = generate_random_min_poly(d, 1, u, 0.5)
+            result.A = self.public_key(result.p, result.t)
+            result.B = self.public_key(result.q, result.r)
+            result.kA = self.shared_key(result.p, result.t, result.B)
+            result.kB = self.shared_key(result.q, result.r, result.A)
+
+            if result.kA == result.kB:
+                return result
+
+
+def random_session(n, u):
+    """
+    Returns a session with random public matrices of size n with entries in [1, u].
+    """
+    return ProtocolSession(generate_random_matrix(n, 1, u), generate_random_matrix(n, 1, u),
+                           generate_random_matrix(n, 1, u))
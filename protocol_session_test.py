@@ -0,0 +1,44 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import random
+import unittest
+import generate_instance
+import matrix_utils
+import protocol_session
+import tropical_algebra as ta
+
+
+class TestProtocolSession(unittest.TestCase):
+    def test_keys(self):
+        random.seed(1)
+        session = protocol_session.random_session(4, 10)
+        M, N, X = session.M, session.N, session.X
+        secrets = [(generate_instance.generate_random_max_poly(d, 1, 10, 0.5),
+                    generate_instance.generate_random_min_poly(d, 1, 10, 0.5)) for d in [1, 8, 3, 5]]
+        secrets.append(([0, 0], [ta.INFTY]))
+        keys = session.public_keys(secrets)
+        self.assertEqual(keys, [matrix_utils.calc_triple_product(M, N, X, p, t) for p, t in secrets])
+        others = list(reversed(keys))
+        self.assertEqual(session.shared_keys(secrets, others),
+                         [matrix_utils.calc_triple_product(M, N, B, p, t) for (p, t), B in zip(secrets, others)])
+
+    def test_instance(self):
+        random.seed(2)
+        session = protocol_session.random_session(3, 10)
+        for _ in range(5):
+            i = session.generate_instance(10, 6)
+            self.assertIs(i.M, session.M)
+            self.assertEqual(i.A, matrix_utils.calc_triple_product(i.M, i.N, i.X, i.p, i.t))
+            self.assertEqual(i.kA, matrix_utils.calc_triple_product(i.M, i.N, i.B, i.p, i.t))
+            self.assertEqual(i.kA, i.kB)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import multiprocessing
+import random
+import sys
+import time
+import matrix_utils
+from benchmark import parse_list
+from check_attack import OK, FAILED, INCORRECT, TIMEOUT, run_instance
+from generate_instance import SeededInstances
+
+FIELDS = ["seed", "size", "c_bound", "d_bound", "p_bound", "t_bound", "count", "ok", "failed", "incorrect", "timeout",
+          "success_rate", "mean_time", "p95_time"]
+"""The columns of the results table."""
+
+
+def percentile(values, q):
+    """
+    Returns the q-th percentile (0 < q <= 100) of the values by the nearest-rank method.
+    """
+    values = sorted(values)
+    return values[max(math.ceil(q / 100 * len(values)) - 1, 0)]
+
+
+def run_instance_bounds(task):
+    """
+    Generates one instance and runs the attack on it with every pair of bounds.
+    task is a tuple (n, c_bound, d_bound, seed, index, bounds, budget, window), where bounds is a list of pairs
+    (p_bound, t_bound), budget and window are the ones of check_attack.run_instance.
+    Returns (n, c_bound, d_bound, index, outcomes), where outcomes is a list of tuples
+    (p_bound, t_bound, status, seconds).
+    """
+    n, c_bound, d_bound, seed, index, bounds, budget, window = task
+    # The instance is the same as the one check_attack generates with this seed.
+    inst = SeededInstances(index + 1, n, c_bound, d_bound, seed)[index]
+    outcomes = []
+    for p_bound, t_bound in bounds:
+        # The powers cached by the previous attack on the instance would make this one look faster.
+        matrix_utils.power_cache.clear()
+        start = time.perf_counter()
+        result = run_instance((0, [inst], p_bound, t_bound, None, budget, window))
+        outcomes.append((p_bound, t_bound, result.status, time.perf_counter() - start))
+    return n, c_bound, d_bound, index, outcomes
+
+
+def sweep(count, sizes, c_bounds, d_bounds, p_bounds, t_bounds, jobs=1, seed=None, timeout=None,
+          max_products=None, window=None):
+    """
+    Runs the attack on count instances for every point of the grid of sizes, c_bounds, d_bounds, p_bounds and t_bounds.
+    Instances depend only on the size, c_bound, d_bound and seed, and every instance is generated once and attacked
+    with all pairs of p_bound and t_bound. The instances are spread over jobs worker processes.
+    timeout and max_products limit the attack as in check_attack.check_attack.
+    Returns a list of rows of the results table, dicts with the keys FIELDS, in the order of the grid.
+    If seed is None, a random seed is used, it is in the seed column of every row.
+    """
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+    budget = None
+    if timeout is not None or max_products is not None:
+        budget = (timeout, max_products)
+    bounds = list(itertools.product(p_bounds, t_bounds))
+    tasks = [(n, c_bound, d_bound, seed, index, bounds, budget, window)
+             for n, c_bound, d_bound in itertools.product(sizes, c_bounds, d_bounds) for index in range(count)]
+
+    outcomes = {}
+    if jobs > 1:
+        with multiprocessing.Pool(jobs) as pool:
+            results = list(pool.imap_unordered(run_instance_bounds, tasks))
+    else:
+        results = map(run_instance_bounds, tasks)
+    for n, c_bound, d_bound, _, instance_outcomes in results:
+        for p_bound, t_bound, status, seconds in instance_outcomes:
+            outcomes.setdefault((n, c_bound, d_bound, p_bound, t_bound), []).append((status, seconds))
+
+    rows = []
+    for n, c_bound, d_bound in itertools.product(sizes, c_bounds, d_bounds):
+        for p_bound, t_bound in bounds:
+            point = outcomes.get((n, c_bound, d_bound, p_bound, t_bound), [])
+            statuses = [status for status, _ in point]
+            times = [seconds for _, seconds in point]
+            rows.append({
+                "seed": seed,
+                "size": n,
+                "c_bound": c_bound,
+                "d_bound": d_bound,
+                "p_bound": p_bound,
+                "t_bound": t_bound,
+                "count": len(point),
+                "ok": statuses.count(OK),
+                "failed": statuses.count(FAILED),
+                "incorrect": statuses.count(INCORRECT),
+                "timeout": statuses.count(TIMEOUT),
+                "success_rate": statuses.count(OK) / len(point) if point else 0.0,
+                "mean_time": sum(times) / len(times) if times else 0.0,
+                "p95_time": percentile(times, 95) if times else 0.0,
+            })
+    return rows
+
+
+def write_rows(rows, f, output_format):
+    """
+    Writes the results table to the file f as "csv" or "json".
+    """
+    if output_format == "json":
+        json.dump(rows, f, indent=1)
+        f.write("\n")
+    else:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def get_arguments_parser():
+    """
+    Creates arguments parser with necessary options.
+    """
+    parser = argparse.ArgumentParser(
+        description="""
+        The script to measure the success rate and the time of the attack over a grid of parameters.
+        """,
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--count", help="Number of instances for every size, c_bound and d_bound", required=True,
+                        type=int)
+    parser.add_argument("--sizes", help="Comma separated sizes of matrices", required=True, type=parse_list)
+    parser.add_argument("--c_bounds", help="Comma separated upper bounds for coefficients", required=True,
+                        type=parse_list)
+    parser.add_argument("--d_bounds", help="Comma separated bounds for degrees of polynomials", required=True,
+                        type=parse_list)
+    parser.add_argument("--p_bounds", help="Comma separated upper bounds for degree of p", required=True,
+                        type=parse_list)
+    parser.add_argument("--t_bounds", help="Comma separated upper bounds for degree of t", required=True,
+                        type=parse_list)
+    parser.add_argument("--jobs", help="Number of worker processes", default=1, type=int)
+    parser.add_argument("--seed", help="Base seed for instances, random if not given", default=None, type=int)
+    parser.add_argument("--timeout", help="Wall-clock limit for the attack on one instance in seconds",
+                        default=None, type=float)
+    parser.add_argument("--max_products", help="Limit for the number of matrix products in the attack on one instance",
+                        default=None, type=int)
+    parser.add_argument("--window", help="Number of powers of M and N kept in memory", default=None, type=int)
+    parser.add_argument("--format", help="Format of the results table", choices=["csv", "json"], default="csv")
+    parser.add_argument("--out", help="Output file, the standard output if not given", default=None)
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = get_arguments_parser().parse_args()
+    rows = sweep(args.count, args.sizes, args.c_bounds, args.d_bounds, args.p_bounds, args.t_bounds, args.jobs,
+                 args.seed, args.timeout, args.max_products, args.window)
+    if args.out is None:
+        write_rows(rows, sys.stdout, args.format)
+    else:
+        with open(args.out, "w", newline="") as f:
+            write_rows(rows, f, args.format)
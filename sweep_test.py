@@ -0,0 +1,52 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import csv
+import io
+import json
+import unittest
+import check_attack
+import generate_instance
+import sweep
+
+
+class TestSweep(unittest.TestCase):
+    def test_sweep(self):
+        rows = sweep.sweep(4, [3], [10], [3, 5], [0, 10], [10], seed=7)
+        self.assertEqual([(r["d_bound"], r["p_bound"], r["t_bound"]) for r in rows],
+                         [(3, 0, 10), (3, 10, 10), (5, 0, 10), (5, 10, 10)])
+        for row in rows:
+            instances = generate_instance.SeededInstances(4, 3, 10, row["d_bound"], 7)
+            statuses = [check_attack.run_instance((i, instances, row["p_bound"], row["t_bound"], None, None,
+                                                   None)).status for i in range(4)]
+            self.assertEqual(row["ok"], statuses.count(check_attack.OK))
+            self.assertEqual(row["count"], 4)
+            self.assertEqual(row["seed"], 7)
+            self.assertEqual(row["success_rate"], row["ok"] / 4)
+            self.assertGreater(row["mean_time"], 0)
+        self.assertEqual(sweep.sweep(4, [3], [10], [3, 5], [0, 10], [10], jobs=2, seed=7)[1]["ok"], rows[1]["ok"])
+        self.assertIsNotNone(sweep.sweep(1, [3], [10], [3], [0], [0])[0]["seed"])
+
+        out = io.StringIO()
+        sweep.write_rows(rows, out, "csv")
+        table = list(csv.DictReader(io.StringIO(out.getvalue())))
+        self.assertEqual(list(table[0]), sweep.FIELDS)
+        self.assertEqual(int(table[1]["ok"]), rows[1]["ok"])
+        out = io.StringIO()
+        sweep.write_rows(rows, out, "json")
+        self.assertEqual(json.loads(out.getvalue()), rows)
+
+    def test_percentile(self):
+        self.assertEqual(sweep.percentile([3, 1, 2], 95), 3)
+        self.assertEqual(sweep.percentile(list(range(1, 101)), 95), 95)
+        self.assertEqual(sweep.percentile([5], 50), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
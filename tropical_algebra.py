@@ -7,12 +7,127 @@ AIP, 2014].
 I. Buchinskiy, M. Kotov, A. Treier, 2022
 """
 
+import math
+import operator
 import sys
+import instrumentation
 
-INFTY = "infty"
+
+class _Infinity:
+    """
+    The type of INFTY. There is the only instance, so infinities are compared by identity, not by value.
+    """
+    __slots__ = ()
+
+    def __repr__(self):
+        return "INFTY"
+
+    def __hash__(self):
+        return 0x1F1
+
+    def __reduce__(self):
+        # Unpickling and copying give the same instance.
+        return "INFTY"
+
+
+INFTY = _Infinity()
 """This constant represent +infinity."""
 
 
+class TropicalMatrix:
+    """
+    An immutable hashable square matrix with flat row-major storage.
+    A[i] is the i-th row as a tuple, so A[i][j] works as for lists of lists, and a TropicalMatrix is equal to
+    a list of lists with the same entries. Operations over semirings return a TropicalMatrix if their first
+    matrix argument is a TropicalMatrix.
+    """
+    __slots__ = ("n", "data", "_hash")
+
+    def __init__(self, rows):
+        object.__setattr__(self, "n", len(rows))
+        object.__setattr__(self, "data", tuple(a for row in rows for a in row))
+        object.__setattr__(self, "_hash", None)
+
+    @classmethod
+    def from_flat(cls, n, data):
+        """
+        Returns the matrix of size n with the entries data in row-major order.
+        """
+        result = cls.__new__(cls)
+        object.__setattr__(result, "n", n)
+        object.__setattr__(result, "data", tuple(data))
+        object.__setattr__(result, "_hash", None)
+        return result
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TropicalMatrix is immutable")
+
+    def __reduce__(self):
+        return TropicalMatrix.from_flat, (self.n, self.data)
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        n = self.n
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("TropicalMatrix index out of range")
+        start = i * n
+        return self.data[start:start + n]
+
+    def __iter__(self):
+        n = self.n
+        data = self.data
+        for i in range(0, n * n, n):
+            yield data[i:i + n]
+
+    def rows(self):
+        """
+        Returns the list of rows as tuples.
+        """
+        return list(self)
+
+    def columns(self):
+        """
+        Returns the list of columns as tuples.
+        """
+        return [self.data[j::self.n] for j in range(self.n)]
+
+    def tolist(self):
+        """
+        Returns the matrix as a list of lists.
+        """
+        return [list(row) for row in self]
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, "_hash", hash((self.n, self.data)))
+        return self._hash
+
+    def __eq__(self, other):
+        if isinstance(other, TropicalMatrix):
+            if self._hash is not None and other._hash is not None and self._hash != other._hash:
+                return False
+            return self.n == other.n and self.data == other.data
+        try:
+            if len(other) != self.n:
+                return False
+            return all(len(b) == self.n and tuple(b) == a for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __repr__(self):
+        return "TropicalMatrix(" + repr(self.tolist()) + ")"
+
+
 def zero_max_times():
     """
     Returns the zero element of R_max-times.
@@ -93,22 +208,21 @@ def sum_matrices_semiring(A, B, sum_elements):
     """
     Returns the sum of two matrices over a semiring.
     """
-    n = len(A)
-    return [[sum_elements(A[i][j], B[i][j]) for j in range(n)] for i in range(n)]
+    return [[sum_elements(a, b) for a, b in zip(row_a, row_b)] for row_a, row_b in zip(A, B)]
 
 
 def sum_matrices_max_times(A, B):
     """
     Returns the sum of two matrices over R_max-times.
     """
-    return sum_matrices_semiring(A, B, sum_max_times)
+    return MAX_TIMES.sum_matrices(A, B)
 
 
 def sum_matrices_min_times(A, B):
     """
     Returns the sum of two matrices over R_min-times.
     """
-    return sum_matrices_semiring(A, B, sum_min_times)
+    return MIN_TIMES.sum_matrices(A, B)
 
 
 def zero_matrix_semiring(n, zero_element):
@@ -122,64 +236,56 @@ def zero_matrix_max_times(n):
     """
     Returns the zero matrix of size n over R_max-times.
     """
-    return zero_matrix_semiring(n, zero_max_times)
+    return MAX_TIMES.zero_matrix(n)
 
 
 def zero_matrix_min_times(n):
     """
     Returns the zero matrix of size n over R_min-times.
     """
-    return zero_matrix_semiring(n, zero_min_times)
+    return MIN_TIMES.zero_matrix(n)
 
 
 def mul_matrices_semiring(A, B, sum_elements, mul_elements, zero_element):
     """
     Returns the product of two matrices over a semiring.
     """
-    n = len(A)
-    C = zero_matrix_semiring(n, zero_element)
-
-    for i in range(n):
-        for j in range(n):
-            for k in range(n):
-                C[i][j] = sum_elements(C[i][j], mul_elements(A[i][k], B[k][j]))
-    return C
+    return Semiring("semiring", sum_elements, mul_elements, zero_element, None)._mul_matrices(A, B)
 
 
 def mul_matrices_max_times(A, B):
     """
     Returns the product of two matrices over R_max-times.
     """
-    return mul_matrices_semiring(A, B, sum_max_times, mul_max_times, zero_max_times)
+    return MAX_TIMES.mul_matrices(A, B)
 
 
 def mul_matrices_min_times(A, B):
     """
     Returns the product of two matrices over R_min-times.
     """
-    return mul_matrices_semiring(A, B, sum_min_times, mul_min_times, zero_min_times)
+    return MIN_TIMES.mul_matrices(A, B)
 
 
 def mul_matrix_by_coef_semiring(A, coef, mul_elements):
     """
     Returns the product of an element of a semiring and a matrix over the semiring.
     """
-    n = len(A)
-    return [[mul_elements(A[i][j], coef) for j in range(n)] for i in range(n)]
+    return [[mul_elements(a, coef) for a in row] for row in A]
 
 
 def mul_matrix_by_coef_max_times(A, coef):
     """
     Returns the product of an element of R_max-times and a matrix over this structure.
     """
-    return mul_matrix_by_coef_semiring(A, coef, mul_max_times)
+    return MAX_TIMES.mul_matrix_by_coef(A, coef)
 
 
 def mul_matrix_by_coef_min_times(A, coef):
     """
     Returns the product of an element of R_min-times and a matrix over this structure.
     """
-    return mul_matrix_by_coef_semiring(A, coef, mul_min_times)
+    return MIN_TIMES.mul_matrix_by_coef(A, coef)
 
 
 def one_matrix_semiring(n, zero_element, one_element):
@@ -193,14 +299,14 @@ def one_matrix_max_times(n):
     """
     Returns the unit matrix of size n over R_max_times.
     """
-    return one_matrix_semiring(n, zero_max_times, one_max_times)
+    return MAX_TIMES.one_matrix(n)
 
 
 def one_matrix_min_times(n):
     """
     Returns the unit matrix of size n over R_min_times.
     """
-    return one_matrix_semiring(n, zero_min_times, one_min_times)
+    return MIN_TIMES.one_matrix(n)
 
 
 def pwr_matrix_semiring(A, m, sum_elements, mul_elements, zero_element, one_element):
@@ -222,43 +328,330 @@ def pwr_matrix_max_times(A, m):
     """
     Returns a matrix raised to the power m over R_max-times.
     """
-    return pwr_matrix_semiring(A, m, sum_max_times, mul_max_times, zero_max_times, one_max_times)
+    return MAX_TIMES.pwr_matrix(A, m)
 
 
 def pwr_matrix_min_times(A, m):
     """
     Returns a matrix raised to the power m over R_min-times.
     """
-    return pwr_matrix_semiring(A, m, sum_min_times, mul_min_times, zero_min_times, one_min_times)
+    return MIN_TIMES.pwr_matrix(A, m)
 
 
 def calc_poly_matrix_semiring(A, p, sum_elements, mul_elements, zero_element, one_element):
     """
     Given a matrix A and a polynomial p over a semiring. Returns p(A).
     """
-    n = len(A)
-    d = len(p) - 1
-    C = zero_matrix_semiring(n, zero_element)
-    D = one_matrix_semiring(n, zero_element, one_element)
-    for i in range(d + 1):
-        C = sum_matrices_semiring(C, mul_matrix_by_coef_semiring(
-            D, p[d - i], mul_elements), sum_elements)
-        if i != d:
-            D = mul_matrices_semiring(
-                D, A, sum_elements, mul_elements, zero_element)
-
-    return C
+    return Semiring("semiring", sum_elements, mul_elements, zero_element, one_element).calc_poly_matrix(A, p)
 
 
 def calc_poly_matrix_max_times(A, p):
     """
     Given a matrix A and a polynomial p over R_max-times. Returns p(A).
     """
-    return calc_poly_matrix_semiring(A, p, sum_max_times, mul_max_times, zero_max_times, one_max_times)
+    return MAX_TIMES.calc_poly_matrix(A, p)
 
 
 def calc_poly_matrix_min_times(A, p):
     """
     Given a matrix A and a polynomial p over R_min-times. Returns p(A).
     """
-    return calc_poly_matrix_semiring(A, p, sum_min_times, mul_min_times, zero_min_times, one_min_times)
+    return MIN_TIMES.calc_poly_matrix(A, p)
+
+
+def _has_infty(A):
+    """
+    Returns True iff the matrix contains infty.
+    """
+    if isinstance(A, TropicalMatrix):
+        return INFTY in A.data
+    return any(INFTY in row for row in A)
+
+
+def _columns(B):
+    """
+    Returns the columns of a matrix as tuples.
+    """
+    if isinstance(B, TropicalMatrix):
+        return B.columns()
+    return list(zip(*B))
+
+
+def _like(A, C):
+    """
+    Returns the result C as a TropicalMatrix if the argument A is a TropicalMatrix.
+    """
+    if isinstance(A, TropicalMatrix) and not isinstance(C, TropicalMatrix):
+        return TropicalMatrix(C)
+    return C
+
+
+def _record(element_ops, products=0, allocated=1):
+    """
+    Counts a matrix operation if instrumentation is enabled.
+    """
+    if instrumentation.enabled():
+        instrumentation.count("matrix_products", products)
+        instrumentation.count("element_ops", element_ops)
+        instrumentation.count("matrices_allocated", allocated)
+
+
+class Semiring:
+    """
+    A semiring given by its operations on elements. Operations on matrices over the semiring are methods,
+    the generic implementations call the element operations for every entry.
+    """
+
+    def __init__(self, name, sum_elements, mul_elements, zero_element, one_element):
+        self.name = name
+        self.sum_elements = sum_elements
+        self.mul_elements = mul_elements
+        self.zero_element = zero_element
+        self.one_element = one_element
+
+    def __repr__(self):
+        return "Semiring(" + self.name + ")"
+
+    def sum_matrices(self, A, B):
+        """
+        Returns the sum of two matrices over the semiring.
+        """
+        _record(len(A) ** 2)
+        return _like(A, self._sum_matrices(A, B))
+
+    def zero_matrix(self, n):
+        """
+        Returns the zero matrix of size n over the semiring.
+        """
+        _record(0)
+        return zero_matrix_semiring(n, self.zero_element)
+
+    def one_matrix(self, n):
+        """
+        Returns the unit matrix of size n over the semiring.
+        """
+        _record(0)
+        return one_matrix_semiring(n, self.zero_element, self.one_element)
+
+    def mul_matrices(self, A, B):
+        """
+        Returns the product of two matrices over the semiring.
+        """
+        _record(2 * len(A) ** 3, products=1)
+        return _like(A, self._mul_matrices(A, B))
+
+    def mul_matrix_by_coef(self, A, coef):
+        """
+        Returns the product of an element of the semiring and a matrix over the semiring.
+        """
+        _record(len(A) ** 2)
+        return _like(A, self._mul_matrix_by_coef(A, coef))
+
+    def add_scaled_matrix(self, C, D, coef):
+        """
+        Returns C + coef * D over the semiring, C is updated in place unless it is a TropicalMatrix.
+        """
+        if isinstance(C, TropicalMatrix):
+            _record(2 * len(C) ** 2)
+            return TropicalMatrix(self._add_scaled_matrix(C.tolist(), D, coef))
+        _record(2 * len(C) ** 2, allocated=0)
+        return self._add_scaled_matrix(C, D, coef)
+
+    # Kernels, the generic ones call the element operations for every entry.
+
+    def _sum_matrices(self, A, B):
+        return sum_matrices_semiring(A, B, self.sum_elements)
+
+    def _mul_matrices(self, A, B):
+        # The row kernel is the only implementation of the product, subclasses specialize it.
+        row_product = self._row_kernel(B)
+        return [row_product(row) for row in A]
+
+    def _mul_matrix_by_coef(self, A, coef):
+        return mul_matrix_by_coef_semiring(A, coef, self.mul_elements)
+
+    def _add_scaled_matrix(self, C, D, coef):
+        for c, d in zip(C, D):
+            for j in range(len(c)):
+                c[j] = self.sum_elements(c[j], self.mul_elements(d[j], coef))
+        return C
+
+    def _row_kernel(self, B):
+        """
+        Returns a function which maps a row of a matrix A to the same row of the product A * B.
+        """
+        cols = _columns(B)
+        zero = self.zero_element()
+
+        def row_product(row):
+            result = []
+            for col in cols:
+                c = zero
+                for a, b in zip(row, col):
+                    c = self.sum_elements(c, self.mul_elements(a, b))
+                result.append(c)
+            return result
+        return row_product
+
+    def pwr_matrix(self, A, m):
+        """
+        Returns a matrix raised to the power m over the semiring.
+        """
+        result = self.one_matrix(len(A))
+        while m > 0:
+            if m % 2 == 1:
+                result = self.mul_matrices(A, result)
+            m //= 2
+            if m > 0:
+                A = self.mul_matrices(A, A)
+        return _like(A, result)
+
+    def calc_poly_matrix(self, A, p):
+        """
+        Given a matrix A and a polynomial p over the semiring. Returns p(A).
+        p[0] is the leading coefficient. Zero coefficients are skipped, and p(A) is computed by the
+        Paterson-Stockmeyer scheme: p(A) = (...(B_m A^s + B_{m-1}) A^s + ...) A^s + B_0, where
+        B_k = sum_l p_{ks+l} A^l, so about 2 sqrt(d) matrix products are needed instead of d.
+        """
+        n = len(A)
+        d = len(p) - 1
+        if d < 0:
+            return _like(A, self.zero_matrix(n))
+        zero = self.zero_element()
+        coefs = p[::-1]
+        s = math.isqrt(d) + 1
+        m = d // s + 1
+
+        # Baby steps: the powers A^0, ..., A^(s - 1) that have non-zero coefficients.
+        top = max((k % s for k in range(d + 1) if coefs[k] != zero), default=0)
+        if m > 1:
+            top = s - 1
+        powers = [self.one_matrix(n)]
+        for _ in range(top):
+            powers.append(self.mul_matrices(powers[-1], A))
+
+        # Giant steps: Horner's scheme in A^s.
+        As = self.mul_matrices(powers[-1], A) if m > 1 else None
+        C = None
+        for k in reversed(range(m)):
+            if C is not None:
+                C = self.mul_matrices(C, As)
+            for l in range(min(s, d + 1 - k * s)):
+                coef = coefs[k * s + l]
+                if coef == zero:
+                    continue
+                if C is None:
+                    C = self.mul_matrix_by_coef(powers[l], coef)
+                else:
+                    C = self.add_scaled_matrix(C, powers[l], coef)
+
+        if C is None:
+            return _like(A, self.zero_matrix(n))
+        return _like(A, C)
+
+
+def _dot_max_times(row, col):
+    """
+    Returns the sum over R_max-times of the products row[k] * col[k], infty is allowed.
+    """
+    m = 0
+    for a, b in zip(row, col):
+        if a == INFTY:
+            if b != 0:
+                return INFTY
+            continue
+        if b == INFTY:
+            if a != 0:
+                return INFTY
+            continue
+        if a * b > m:
+            m = a * b
+    return m
+
+
+class MaxTimesSemiring(Semiring):
+    """
+    R_max-times with kernels specialized for matrices without infinities.
+    """
+
+    def __init__(self):
+        super().__init__("max-times", sum_max_times, mul_max_times, zero_max_times, one_max_times)
+
+    def _sum_matrices(self, A, B):
+        if _has_infty(A) or _has_infty(B):
+            return super()._sum_matrices(A, B)
+        return [list(map(max, a, b)) for a, b in zip(A, B)]
+
+    def _row_kernel(self, B):
+        cols = _columns(B)
+        infty = _has_infty(cols)
+        negative = not infty and min(map(min, cols), default=0) < 0
+
+        def row_product(row):
+            if infty or INFTY in row:
+                return [_dot_max_times(row, col) for col in cols]
+            if negative or min(row, default=0) < 0:
+                # The zero of R_max-times takes part in the sum for negative entries.
+                return [max(0, max(map(operator.mul, row, col))) for col in cols]
+            return [max(map(operator.mul, row, col)) for col in cols]
+        return row_product
+
+    def _mul_matrix_by_coef(self, A, coef):
+        if coef == INFTY or _has_infty(A):
+            return super()._mul_matrix_by_coef(A, coef)
+        return [[a * coef for a in row] for row in A]
+
+    def _add_scaled_matrix(self, C, D, coef):
+        if coef == INFTY or _has_infty(C) or _has_infty(D):
+            return super()._add_scaled_matrix(C, D, coef)
+        for c, d in zip(C, D):
+            c[:] = map(max, c, [a * coef for a in d])
+        return C
+
+
+class MinTimesSemiring(Semiring):
+    """
+    R_min-times with kernels that skip infinities instead of comparing every product against them.
+    """
+
+    def __init__(self):
+        super().__init__("min-times", sum_min_times, mul_min_times, zero_min_times, one_min_times)
+
+    def _sum_matrices(self, A, B):
+        if _has_infty(A) or _has_infty(B):
+            return super()._sum_matrices(A, B)
+        return [list(map(min, a, b)) for a, b in zip(A, B)]
+
+    def _row_kernel(self, B):
+        cols = _columns(B)
+        infty = _has_infty(cols)
+
+        def row_product(row):
+            if infty or INFTY in row:
+                return [min((a * b for a, b in zip(row, col) if a != INFTY and b != INFTY), default=INFTY)
+                        for col in cols]
+            return [min(map(operator.mul, row, col)) for col in cols]
+        return row_product
+
+    def _mul_matrix_by_coef(self, A, coef):
+        if coef == INFTY:
+            return zero_matrix_semiring(len(A), zero_min_times)
+        if _has_infty(A):
+            return super()._mul_matrix_by_coef(A, coef)
+        return [[a * coef for a in row] for row in A]
+
+    def _add_scaled_matrix(self, C, D, coef):
+        if coef == INFTY:
+            return C
+        if _has_infty(C) or _has_infty(D):
+            return super()._add_scaled_matrix(C, D, coef)
+        for c, d in zip(C, D):
+            c[:] = map(min, c, [a * coef for a in d])
+        return C
+
+
+MAX_TIMES = MaxTimesSemiring()
+"""R_max-times."""
+
+MIN_TIMES = MinTimesSemiring()
+"""R_min-times."""
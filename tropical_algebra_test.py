@@ -7,9 +7,12 @@ AIP, 2014].
 I. Buchinskiy, M. Kotov, A. Treier, 2022
 """
 
+import copy
+import pickle
 import sys
 import unittest
 import tropical_algebra
+import matrix_utils
 import random
 
 
@@ -282,6 +285,97 @@ class TestTropicalAlgebra(unittest.TestCase):
         self.assertEqual(tropical_algebra.mul_min_times(a, tropical_algebra.sum_min_times(b, b)),
                          tropical_algebra.sum_min_times(tropical_algebra.mul_min_times(a, b), tropical_algebra.mul_min_times(a, b)))
 
+    def test_semiring_kernels(self):
+        random.seed(1)
+        for n in range(1, 6):
+            for _ in range(20):
+                A = [[random.choice([0, tropical_algebra.INFTY, random.randint(1, 50)]) for j in range(n)]
+                     for i in range(n)]
+                B = [[random.choice([0, tropical_algebra.INFTY, random.randint(1, 50)]) for j in range(n)]
+                     for i in range(n)]
+                for semiring in [tropical_algebra.MAX_TIMES, tropical_algebra.MIN_TIMES]:
+                    generic = tropical_algebra.Semiring(semiring.name, semiring.sum_elements, semiring.mul_elements,
+                                                        semiring.zero_element, semiring.one_element)
+                    self.assertEqual(generic.mul_matrices(A, B), semiring.mul_matrices(A, B))
+                    self.assertEqual(generic.sum_matrices(A, B), semiring.sum_matrices(A, B))
+                    for coef in [0, 3, tropical_algebra.INFTY]:
+                        self.assertEqual(generic.mul_matrix_by_coef(A, coef), semiring.mul_matrix_by_coef(A, coef))
+                    self.assertEqual(pwr_matrix_reference(generic, A, 5), semiring.pwr_matrix(A, 5))
+
+    def test_calc_poly_matrix_sparse(self):
+        random.seed(2)
+        for semiring in [tropical_algebra.MAX_TIMES, tropical_algebra.MIN_TIMES]:
+            for d in range(0, 20):
+                A = [[random.randint(1, 9) for j in range(3)] for i in range(3)]
+                p = [random.choice([semiring.zero_element(), random.randint(1, 9)]) for i in range(d + 1)]
+                self.assertEqual(calc_poly_matrix_reference(semiring, A, p), semiring.calc_poly_matrix(A, p))
+        A = [[0, tropical_algebra.INFTY], [2, 1]]
+        p = [3, tropical_algebra.INFTY, 0, 0, 1, 0, 2]
+        self.assertEqual(calc_poly_matrix_reference(tropical_algebra.MAX_TIMES, A, p),
+                         tropical_algebra.calc_poly_matrix_max_times(A, p))
+
+    def test_infty_singleton(self):
+        b = tropical_algebra.INFTY
+        self.assertIs(b, pickle.loads(pickle.dumps(b)))
+        self.assertIs(b, copy.deepcopy(b))
+        self.assertNotEqual(b, 0)
+        self.assertEqual("INFTY", repr(b))
+
+    def test_tropical_matrix(self):
+        rows = [[1, 2, 0], [4, tropical_algebra.INFTY, 6], [7, 8, 9]]
+        A = tropical_algebra.TropicalMatrix(rows)
+        self.assertEqual(rows, A)
+        self.assertEqual(A, rows)
+        self.assertEqual(A, tropical_algebra.TropicalMatrix.from_flat(3, A.data))
+        self.assertEqual(hash(A), hash(tropical_algebra.TropicalMatrix(rows)))
+        self.assertNotEqual(A, tropical_algebra.TropicalMatrix([[1, 2], [3, 4]]))
+        self.assertEqual((4, tropical_algebra.INFTY, 6), A[1])
+        self.assertEqual(9, A[-1][-1])
+        self.assertRaises(IndexError, A.__getitem__, 3)
+        self.assertRaises(IndexError, A.__getitem__, -4)
+        self.assertEqual(rows, A.tolist())
+        self.assertEqual(A, pickle.loads(pickle.dumps(A)))
+        with self.assertRaises(AttributeError):
+            A.n = 2
+
+    def test_tropical_matrix_operations(self):
+        rows = [[5, 7, 1], [4, 2, 3], [2, 5, 6]]
+        other = [[2, 1, 3], [7, tropical_algebra.INFTY, 4], [0, 1, 9]]
+        A = tropical_algebra.TropicalMatrix(rows)
+        B = tropical_algebra.TropicalMatrix(other)
+        for name in ["sum_matrices", "mul_matrices"]:
+            for dioid in ["max_times", "min_times"]:
+                f = getattr(tropical_algebra, name + "_" + dioid)
+                self.assertEqual(f(rows, other), f(A, B))
+                self.assertIsInstance(f(A, B), tropical_algebra.TropicalMatrix)
+                self.assertEqual(f(rows, other), f(A, other))
+        for dioid in ["max_times", "min_times"]:
+            f = getattr(tropical_algebra, "mul_matrix_by_coef_" + dioid)
+            self.assertEqual(f(other, 3), f(B, 3))
+            f = getattr(tropical_algebra, "pwr_matrix_" + dioid)
+            self.assertEqual(f(rows, 5), f(A, 5))
+            f = getattr(tropical_algebra, "calc_poly_matrix_" + dioid)
+            self.assertEqual(f(rows, [1, 5, 10, 0]), f(A, [1, 5, 10, 0]))
+            self.assertIsInstance(f(A, [1, 5, 10, 0]), tropical_algebra.TropicalMatrix)
+        self.assertEqual(matrix_utils.calc_min(rows), matrix_utils.calc_min(A))
+        self.assertEqual(matrix_utils.calc_max(other), matrix_utils.calc_max(B))
+        self.assertEqual(matrix_utils.calc_triple_product(rows, rows, rows, [1, 2], [3, 4]),
+                         matrix_utils.calc_triple_product(A, A, A, [1, 2], [3, 4]))
+        self.assertEqual(matrix_utils.projective_fingerprint(other), matrix_utils.projective_fingerprint(B))
+
+
+def pwr_matrix_reference(semiring, A, m):
+    return tropical_algebra.pwr_matrix_semiring(A, m, semiring.sum_elements, semiring.mul_elements,
+                                                semiring.zero_element, semiring.one_element)
+
+
+def calc_poly_matrix_reference(semiring, A, p):
+    d = len(p) - 1
+    C = semiring.zero_matrix(len(A))
+    for i in range(d + 1):
+        C = semiring.sum_matrices(C, semiring.mul_matrix_by_coef(pwr_matrix_reference(semiring, A, i), p[d - i]))
+    return C
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,289 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import tropical_algebra as ta
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+INT64_MAX = 2 ** 63 - 1
+"""Entries (and products of entries) above this bound are stored in object arrays."""
+
+
+def is_available():
+    """
+    Returns True iff NumPy is installed and the array backend can be used.
+    """
+    return np is not None
+
+
+def _check_available():
+    if np is None:
+        raise ImportError("tropical_numpy requires NumPy")
+
+
+def _max_value(values):
+    """
+    Returns the maximum of the finite values of an array (0 for an empty array).
+    """
+    if values.size == 0:
+        return 0
+    return int(values.max())
+
+
+def _as_dtype(values, dtype):
+    if values.dtype == dtype:
+        return values
+    if dtype == object:
+        return np.array(values.tolist(), dtype=object).reshape(values.shape)
+    return values.astype(dtype)
+
+
+def _common_dtype(a, b, bound):
+    """
+    Casts two arrays to int64 if bound fits into int64, and to object arrays otherwise.
+    """
+    dtype = np.int64 if bound < INT64_MAX else object
+    if a.dtype == object or b.dtype == object:
+        dtype = object
+    return _as_dtype(a, dtype), _as_dtype(b, dtype)
+
+
+def to_arrays(A):
+    """
+    Converts a matrix (or a sequence of matrices of the same size) to a pair (values, infty), where infty is
+    a boolean mask of infinite entries and values holds finite entries (0 in place of infinities).
+    Values are int64 if they fit, object arrays of Python integers otherwise.
+    """
+    _check_available()
+    entries = np.array(A, dtype=object)
+    if entries.size == 0:
+        entries = entries.reshape(entries.shape + (0,) * (2 - entries.ndim))
+    infty = entries == ta.INFTY
+    values = np.where(infty, 0, entries)
+    bound = max((abs(a) for a in values.flat), default=0)
+    if bound < INT64_MAX:
+        values = values.astype(np.int64)
+    return values, np.asarray(infty, dtype=bool)
+
+
+def from_arrays(values, infty):
+    """
+    Converts a pair (values, infty) back to a list-of-lists matrix (or a list of such matrices).
+    """
+    result = values.tolist()
+    for index in np.argwhere(infty):
+        row = result
+        for k in index[:-1]:
+            row = row[k]
+        row[index[-1]] = ta.INFTY
+    return result
+
+
+def _sum_max_times(X, Y):
+    a, ainf = X
+    b, binf = Y
+    a, b = _common_dtype(a, b, 0)
+    return np.maximum(a, b), ainf | binf
+
+
+def _sum_min_times(X, Y):
+    a, ainf = X
+    b, binf = Y
+    a, b = _common_dtype(a, b, 0)
+    c = np.where(ainf, b, np.where(binf, a, np.minimum(a, b)))
+    return c, ainf & binf
+
+
+def _mul_max_times(X, Y):
+    a, ainf = X
+    b, binf = Y
+    n = a.shape[-1]
+    a, b = _common_dtype(a, b, _max_value(a) * _max_value(b))
+    anz = ainf | (a != 0)
+    bnz = binf | (b != 0)
+    c = np.zeros(a.shape, dtype=a.dtype)
+    cinf = np.zeros(a.shape, dtype=bool)
+    for i in range(n):
+        # Rows of the (k, j) tables a[i][k] * b[k][j]; infinity times zero is zero in R_max-times.
+        c[..., i, :] = np.maximum((a[..., i, :, None] * b).max(axis=-2), 0)
+        cinf[..., i, :] = ((ainf[..., i, :, None] & bnz) | (anz[..., i, :, None] & binf)).any(axis=-2)
+    c[cinf] = 0
+    return c, cinf
+
+
+def _mul_min_times(X, Y):
+    a, ainf = X
+    b, binf = Y
+    n = a.shape[-1]
+    bound = _max_value(a) * _max_value(b)
+    a, b = _common_dtype(a, b, bound + 1)
+    c = np.zeros(a.shape, dtype=a.dtype)
+    cinf = np.zeros(a.shape, dtype=bool)
+    for i in range(n):
+        terms = a[..., i, :, None] * b
+        term_inf = ainf[..., i, :, None] | binf
+        # bound + 1 is larger than every finite term, so it never wins the minimum.
+        terms[term_inf] = bound + 1
+        c[..., i, :] = terms.min(axis=-2)
+        cinf[..., i, :] = term_inf.all(axis=-2)
+    c[cinf] = 0
+    return c, cinf
+
+
+def _mul_by_coef_max_times(X, coef):
+    a, ainf = X
+    if coef == ta.INFTY:
+        # infty * 0 = 0, infty * a = infty otherwise.
+        cinf = ainf | (a != 0)
+        return np.zeros_like(a), cinf
+    a, _ = _common_dtype(a, a, _max_value(a) * abs(coef))
+    if coef == 0:
+        return np.zeros_like(a), np.zeros_like(ainf)
+    c = a * coef
+    c[ainf] = 0
+    return c, ainf.copy()
+
+
+def _mul_by_coef_min_times(X, coef):
+    a, ainf = X
+    if coef == ta.INFTY:
+        return np.zeros_like(a), np.ones_like(ainf)
+    a, _ = _common_dtype(a, a, _max_value(a) * abs(coef))
+    c = a * coef
+    c[ainf] = 0
+    return c, ainf.copy()
+
+
+def _zero_max_times(n):
+    return np.zeros((n, n), dtype=np.int64), np.zeros((n, n), dtype=bool)
+
+
+def _zero_min_times(n):
+    return np.zeros((n, n), dtype=np.int64), np.ones((n, n), dtype=bool)
+
+
+def _one_max_times(n):
+    return np.identity(n, dtype=np.int64), np.zeros((n, n), dtype=bool)
+
+
+def _one_min_times(n):
+    return np.identity(n, dtype=np.int64), ~np.identity(n, dtype=bool)
+
+
+def _pwr(X, m, mul, one):
+    n = X[0].shape[0]
+    result = one(n)
+    while m > 0:
+        if m % 2 == 1:
+            result = mul(result, X)
+        m //= 2
+        if m > 0:
+            X = mul(X, X)
+    return result
+
+
+def _calc_poly(X, p, add, mul, mul_by_coef, zero, one):
+    n = X[0].shape[0]
+    d = len(p) - 1
+    C = zero(n)
+    D = one(n)
+    for i in range(d + 1):
+        C = add(C, mul_by_coef(D, p[d - i]))
+        if i != d:
+            D = mul(D, X)
+    return C
+
+
+def sum_matrices_max_times(A, B):
+    """
+    Returns the sum of two matrices over R_max-times.
+    """
+    return from_arrays(*_sum_max_times(to_arrays(A), to_arrays(B)))
+
+
+def sum_matrices_min_times(A, B):
+    """
+    Returns the sum of two matrices over R_min-times.
+    """
+    return from_arrays(*_sum_min_times(to_arrays(A), to_arrays(B)))
+
+
+def mul_matrices_max_times(A, B):
+    """
+    Returns the product of two matrices over R_max-times.
+    """
+    return from_arrays(*_mul_max_times(to_arrays(A), to_arrays(B)))
+
+
+def mul_matrices_min_times(A, B):
+    """
+    Returns the product of two matrices over R_min-times.
+    """
+    return from_arrays(*_mul_min_times(to_arrays(A), to_arrays(B)))
+
+
+def mul_matrix_by_coef_max_times(A, coef):
+    """
+    Returns the product of an element of R_max-times and a matrix over this structure.
+    """
+    return from_arrays(*_mul_by_coef_max_times(to_arrays(A), coef))
+
+
+def mul_matrix_by_coef_min_times(A, coef):
+    """
+    Returns the product of an element of R_min-times and a matrix over this structure.
+    """
+    return from_arrays(*_mul_by_coef_min_times(to_arrays(A), coef))
+
+
+def pwr_matrix_max_times(A, m):
+    """
+    Returns a matrix raised to the power m over R_max-times.
+    """
+    return from_arrays(*_pwr(to_arrays(A), m, _mul_max_times, _one_max_times))
+
+
+def pwr_matrix_min_times(A, m):
+    """
+    Returns a matrix raised to the power m over R_min-times.
+    """
+    return from_arrays(*_pwr(to_arrays(A), m, _mul_min_times, _one_min_times))
+
+
+def calc_poly_matrix_max_times(A, p):
+    """
+    Given a matrix A and a polynomial p over R_max-times. Returns p(A).
+    """
+    return from_arrays(*_calc_poly(to_arrays(A), p, _sum_max_times, _mul_max_times,
+                                   _mul_by_coef_max_times, _zero_max_times, _one_max_times))
+
+
+def calc_poly_matrix_min_times(A, p):
+    """
+    Given a matrix A and a polynomial p over R_min-times. Returns p(A).
+    """
+    return from_arrays(*_calc_poly(to_arrays(A), p, _sum_min_times, _mul_min_times,
+                                   _mul_by_coef_min_times, _zero_min_times, _one_min_times))
+
+
+def mul_matrices_max_times_batch(As, Bs):
+    """
+    Returns the list of products As[k] * Bs[k] over R_max-times, the matrices are stacked and multiplied at once.
+    """
+    return from_arrays(*_mul_max_times(to_arrays(As), to_arrays(Bs)))
+
+
+def mul_matrices_min_times_batch(As, Bs):
+    """
+    Returns the list of products As[k] * Bs[k] over R_min-times, the matrices are stacked and multiplied at once.
+    """
+    return from_arrays(*_mul_min_times(to_arrays(As), to_arrays(Bs)))
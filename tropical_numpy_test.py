@@ -0,0 +1,77 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import random
+import unittest
+import tropical_algebra as ta
+import tropical_numpy as tn
+
+
+def random_matrix(n, u, special_rate):
+    """
+    Generates a random matrix with entries in [0, u], some of them are replaced with 0 and infty.
+    """
+    result = [[random.randint(1, u) for j in range(n)] for i in range(n)]
+    for i in range(n):
+        for j in range(n):
+            x = random.random()
+            if x < special_rate:
+                result[i][j] = 0
+            elif x < 2 * special_rate:
+                result[i][j] = ta.INFTY
+    return result
+
+
+@unittest.skipUnless(tn.is_available(), "NumPy is not installed")
+class TestTropicalNumpy(unittest.TestCase):
+    def setUp(self):
+        random.seed(1)
+
+    def test_mul_matrices(self):
+        for n in range(1, 6):
+            for _ in range(20):
+                A = random_matrix(n, 100, 0.15)
+                B = random_matrix(n, 100, 0.15)
+                self.assertEqual(ta.mul_matrices_max_times(A, B), tn.mul_matrices_max_times(A, B))
+                self.assertEqual(ta.mul_matrices_min_times(A, B), tn.mul_matrices_min_times(A, B))
+
+    def test_sum_matrices(self):
+        for _ in range(20):
+            A = random_matrix(4, 100, 0.2)
+            B = random_matrix(4, 100, 0.2)
+            self.assertEqual(ta.sum_matrices_max_times(A, B), tn.sum_matrices_max_times(A, B))
+            self.assertEqual(ta.sum_matrices_min_times(A, B), tn.sum_matrices_min_times(A, B))
+
+    def test_mul_matrix_by_coef(self):
+        A = random_matrix(4, 100, 0.2)
+        for coef in [0, 1, 7, 2 ** 70, ta.INFTY]:
+            self.assertEqual(ta.mul_matrix_by_coef_max_times(A, coef), tn.mul_matrix_by_coef_max_times(A, coef))
+            self.assertEqual(ta.mul_matrix_by_coef_min_times(A, coef), tn.mul_matrix_by_coef_min_times(A, coef))
+
+    def test_object_fallback(self):
+        A = [[2 ** 40, 3], [5, 2 ** 62]]
+        B = [[2 ** 30, 2 ** 70], [1, 0]]
+        self.assertEqual(ta.mul_matrices_max_times(A, B), tn.mul_matrices_max_times(A, B))
+        self.assertEqual(ta.mul_matrices_min_times(A, B), tn.mul_matrices_min_times(A, B))
+        self.assertEqual(ta.pwr_matrix_max_times(A, 5), tn.pwr_matrix_max_times(A, 5))
+
+    def test_pwr_and_poly(self):
+        for _ in range(10):
+            A = random_matrix(4, 50, 0.1)
+            for m in range(8):
+                self.assertEqual(ta.pwr_matrix_max_times(A, m), tn.pwr_matrix_max_times(A, m))
+                self.assertEqual(ta.pwr_matrix_min_times(A, m), tn.pwr_matrix_min_times(A, m))
+            p = [random.randint(1, 50), 0, random.randint(1, 50), 3, 0, 8, 1, 9, 5, 5, 5, 5, 5, 5, 5, 5, 5]
+            t = [random.randint(1, 50), ta.INFTY, 2, 7, ta.INFTY]
+            self.assertEqual(ta.calc_poly_matrix_max_times(A, p), tn.calc_poly_matrix_max_times(A, p))
+            self.assertEqual(ta.calc_poly_matrix_min_times(A, t), tn.calc_poly_matrix_min_times(A, t))
+
+
+if __name__ == "__main__":
+    unittest.main()
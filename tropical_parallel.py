@@ -0,0 +1,270 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+
+Matrix products over R_max-times and R_min-times split by blocks of rows across a persistent pool of
+worker processes. The operands are written once per product to a shared memory block, and the workers
+get only the offsets of their rows, so the matrices are not pickled for every worker.
+"""
+
+import array
+import atexit
+import multiprocessing
+import os
+from multiprocessing import resource_tracker, shared_memory
+import tropical_algebra as ta
+from entry_codec import read_entry, write_entry
+
+THRESHOLD = 96
+"""Matrices of smaller size are multiplied by the serial kernel, for them the pool costs more than it saves."""
+
+_INT64 = "q"
+_VARINT = "v"
+_INFTY64 = -2 ** 63
+"""The int64 code of infty, integers are stored as int64 only if they are greater than it."""
+
+_SEMIRINGS = {ta.MAX_TIMES.name: ta.MAX_TIMES, ta.MIN_TIMES.name: ta.MIN_TIMES}
+
+
+def _kind(*matrices):
+    """
+    Returns the encoding for the matrices: int64 if all entries fit, otherwise entry_codec.write_entry.
+    """
+    for A in matrices:
+        for row in A:
+            if not all(a == ta.INFTY or _INFTY64 < a < 2 ** 63 for a in row):
+                return _VARINT
+    return _INT64
+
+
+def _encode(A, kind):
+    """
+    Returns the bytes of the matrix and the offsets of its rows in the bytes.
+    """
+    n = len(A)
+    if kind == _INT64:
+        data = array.array(_INT64, [_INFTY64 if a == ta.INFTY else a for row in A for a in row]).tobytes()
+        return data, [8 * n * i for i in range(n + 1)]
+    out = bytearray()
+    offsets = [0]
+    for row in A:
+        for a in row:
+            write_entry(out, a)
+        offsets.append(len(out))
+    return out, offsets
+
+
+def _decode_rows(kind, buf, n):
+    """
+    Decodes the rows of a matrix with n columns encoded by _encode.
+    """
+    if kind == _INT64:
+        values = buf.cast(_INT64).tolist()
+        if _INFTY64 in values:
+            values = [ta.INFTY if a == _INFTY64 else a for a in values]
+        return [values[k:k + n] for k in range(0, len(values), n)]
+    rows = []
+    row = []
+    pos = 0
+    while pos < len(buf):
+        a, pos = read_entry(buf, pos)
+        row.append(a)
+        if len(row) == n:
+            rows.append(row)
+            row = []
+    return rows
+
+
+_attached = {}
+
+
+def _attach(name):
+    """
+    Returns the shared memory block with the name in a worker, the last block is kept attached.
+    """
+    shm = _attached.get(name)
+    if shm is not None:
+        return shm
+    for old in _attached.values():
+        old.close()
+    _attached.clear()
+    try:
+        shm = shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the block with the resource tracker,
+        # then the block would be unlinked when the worker exits.
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+    _attached[name] = shm
+    return shm
+
+
+def _mul_block(task):
+    """
+    Computes the rows [a_start, a_stop) (byte offsets) of A times B in a worker.
+    """
+    name, semiring, kind, n, a_start, a_stop, b_start, b_stop = task
+    buf = _attach(name).buf
+    A = _decode_rows(kind, buf[a_start:a_stop], n)
+    B = _decode_rows(kind, buf[b_start:b_stop], n)
+    return _SEMIRINGS[semiring]._mul_matrices(A, B)
+
+
+class RowBlockPool:
+    """
+    A persistent pool of processes which multiply matrices by blocks of rows.
+    The shared memory block for the operands is reused between products and grows when needed.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes or os.cpu_count()
+        self._pool = multiprocessing.Pool(self.processes)
+        self._shm = None
+
+    def _buffer(self, size):
+        if self._shm is None or self._shm.size < size:
+            old_size = 0
+            if self._shm is not None:
+                old_size = self._shm.size
+                self._shm.close()
+                self._shm.unlink()
+            self._shm = shared_memory.SharedMemory(create=True, size=max(size, 2 * old_size))
+        return self._shm
+
+    def mul_matrices(self, semiring, A, B):
+        """
+        Returns the product A * B over R_max-times or R_min-times computed by the workers.
+        """
+        n = len(A)
+        kind = _kind(A, B)
+        data_a, offsets = _encode(A, kind)
+        data_b, _ = _encode(B, kind)
+
+        shm = self._buffer(len(data_a) + len(data_b))
+        shm.buf[:len(data_a)] = data_a
+        shm.buf[len(data_a):len(data_a) + len(data_b)] = data_b
+
+        blocks = min(self.processes, n)
+        bounds = [n * k // blocks for k in range(blocks + 1)]
+        tasks = [(shm.name, semiring.name, kind, n, offsets[bounds[k]], offsets[bounds[k + 1]],
+                  len(data_a), len(data_a) + len(data_b)) for k in range(blocks)]
+        result = []
+        for rows in self._pool.map(_mul_block, tasks):
+            result.extend(rows)
+        return result
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+
+_pools = {}
+
+
+def get_pool(processes=None):
+    """
+    Returns the persistent pool with the given number of processes (the number of CPUs by default).
+    """
+    processes = processes or os.cpu_count()
+    pool = _pools.get(processes)
+    if pool is None:
+        pool = _pools[processes] = RowBlockPool(processes)
+    return pool
+
+
+@atexit.register
+def close_pools():
+    """
+    Stops the workers and frees the shared memory.
+    """
+    for pool in _pools.values():
+        pool.close()
+    _pools.clear()
+
+
+class ParallelSemiring(ta.Semiring):
+    """
+    R_max-times or R_min-times where products of matrices of size at least threshold are split by rows
+    across a persistent pool of processes. Other operations and smaller products use the serial kernels of
+    the base semiring, and so do pwr_matrix and calc_poly_matrix except for their products.
+    """
+
+    def __init__(self, base, processes=None, threshold=THRESHOLD):
+        super().__init__(base.name, base.sum_elements, base.mul_elements, base.zero_element, base.one_element)
+        self.base = base
+        self.processes = processes
+        self.threshold = threshold
+
+    def __repr__(self):
+        return "ParallelSemiring(" + self.name + ")"
+
+    def _sum_matrices(self, A, B):
+        return self.base._sum_matrices(A, B)
+
+    def _mul_matrices(self, A, B):
+        if len(A) < self.threshold or (self.processes or os.cpu_count()) < 2:
+            return self.base._mul_matrices(A, B)
+        return get_pool(self.processes).mul_matrices(self.base, A, B)
+
+    def _mul_matrix_by_coef(self, A, coef):
+        return self.base._mul_matrix_by_coef(A, coef)
+
+    def _add_scaled_matrix(self, C, D, coef):
+        return self.base._add_scaled_matrix(C, D, coef)
+
+
+MAX_TIMES = ParallelSemiring(ta.MAX_TIMES)
+"""R_max-times with parallel products on all CPUs."""
+
+MIN_TIMES = ParallelSemiring(ta.MIN_TIMES)
+"""R_min-times with parallel products on all CPUs."""
+
+
+def mul_matrices_max_times(A, B):
+    """
+    Returns the product of two matrices over R_max-times.
+    """
+    return MAX_TIMES.mul_matrices(A, B)
+
+
+def mul_matrices_min_times(A, B):
+    """
+    Returns the product of two matrices over R_min-times.
+    """
+    return MIN_TIMES.mul_matrices(A, B)
+
+
+def pwr_matrix_max_times(A, m):
+    """
+    Returns a matrix raised to the power m over R_max-times.
+    """
+    return MAX_TIMES.pwr_matrix(A, m)
+
+
+def pwr_matrix_min_times(A, m):
+    """
+    Returns a matrix raised to the power m over R_min-times.
+    """
+    return MIN_TIMES.pwr_matrix(A, m)
+
+
+def calc_poly_matrix_max_times(A, p):
+    """
+    Given a matrix A and a polynomial p over R_max-times. Returns p(A).
+    """
+    return MAX_TIMES.calc_poly_matrix(A, p)
+
+
+def calc_poly_matrix_min_times(A, p):
+    """
+    Given a matrix A and a polynomial p over R_min-times. Returns p(A).
+    """
+    return MIN_TIMES.calc_poly_matrix(A, p)
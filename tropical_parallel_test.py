@@ -0,0 +1,53 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import random
+import unittest
+import tropical_algebra as ta
+import tropical_parallel as tp
+
+
+def generate_matrix(n, u, infty_rate=0.0):
+    return [[ta.INFTY if random.random() < infty_rate else random.randint(1, u) for _ in range(n)]
+            for _ in range(n)]
+
+
+class TestTropicalParallel(unittest.TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        tp.close_pools()
+
+    def test_encoding(self):
+        A = [[1, ta.INFTY, -5], [2 ** 62, 0, 7], [3, 4, ta.INFTY]]
+        for kind in (tp._INT64, tp._VARINT):
+            data, offsets = tp._encode(A, kind)
+            self.assertEqual(tp._decode_rows(kind, memoryview(bytes(data)), 3), A)
+            self.assertEqual(tp._decode_rows(kind, memoryview(bytes(data[offsets[1]:offsets[2]])), 3), A[1:2])
+        self.assertEqual(tp._kind(A, [[2 ** 63]]), tp._VARINT)
+
+    def test_products(self):
+        random.seed(18)
+        for u in (1000, 10 ** 30):
+            A = generate_matrix(7, u)
+            B = generate_matrix(7, u, 0.3)
+            for base in (ta.MAX_TIMES, ta.MIN_TIMES):
+                semiring = tp.ParallelSemiring(base, processes=2, threshold=1)
+                self.assertEqual(semiring.mul_matrices(A, B), base.mul_matrices(A, B))
+                self.assertEqual(semiring.pwr_matrix(A, 6), base.pwr_matrix(A, 6))
+                self.assertEqual(semiring.calc_poly_matrix(ta.TropicalMatrix(A), [2, 0, 5, 1]),
+                                 base.calc_poly_matrix(A, [2, 0, 5, 1]))
+
+    def test_threshold(self):
+        A = generate_matrix(3, 10)
+        self.assertEqual(tp.mul_matrices_max_times(A, A), ta.mul_matrices_max_times(A, A))
+        self.assertEqual(tp.pwr_matrix_min_times(A, 3), ta.pwr_matrix_min_times(A, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
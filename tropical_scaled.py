@@ -0,0 +1,146 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+
+Sums and products over R_max-times and R_min-times commute with multiplication by positive numbers:
+(c A) * (d B) = c d (A * B). The powers of a matrix share large common factors, so a matrix is stored as
+a positive scalar times a primitive matrix and the operations run on the smaller primitive entries.
+"""
+
+import math
+import tropical_algebra as ta
+
+
+def _content(A):
+    """
+    Returns the gcd of the finite non-zero entries of A, 0 if there are none.
+    """
+    return math.gcd(*[a for row in A for a in row if a != 0 and a != ta.INFTY])
+
+
+def _scale(A, c):
+    """
+    Returns the entries of A multiplied by c as a list of lists, infty and 0 are kept.
+    """
+    if c == 1:
+        return [list(row) for row in A]
+    return [[a if a == ta.INFTY else a * c for a in row] for row in A]
+
+
+class ScaledMatrix:
+    """
+    A matrix scalar * primitive, where scalar is a positive integer and primitive is a list of lists whose
+    finite non-zero entries have no common factor (or are absent). Indexing and iteration give the rows of
+    the matrix itself as tuples, so the functions for ordinary matrices accept scaled matrices as well.
+    """
+
+    __hash__ = None
+
+    def __init__(self, scalar, primitive):
+        self.scalar = scalar
+        self.primitive = primitive
+
+    @classmethod
+    def normalize(cls, A, scalar=1):
+        """
+        Returns scalar * A as a ScaledMatrix, the content of A is moved to the scalar.
+        """
+        g = _content(A)
+        if g > 1:
+            return cls(scalar * g, [[a if a == ta.INFTY else a // g for a in row] for row in A])
+        return cls(scalar, [list(row) for row in A])
+
+    def __len__(self):
+        return len(self.primitive)
+
+    def __getitem__(self, i):
+        c = self.scalar
+        return tuple(a if a == ta.INFTY else a * c for a in self.primitive[i])
+
+    def __iter__(self):
+        for i in range(len(self.primitive)):
+            yield self[i]
+
+    def tolist(self):
+        """
+        Returns the matrix as a list of lists.
+        """
+        return _scale(self.primitive, self.scalar)
+
+    def __eq__(self, other):
+        if isinstance(other, ScaledMatrix):
+            return self.scalar == other.scalar and self.primitive == other.primitive
+        try:
+            return self.tolist() == [list(row) for row in other]
+        except TypeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __repr__(self):
+        return "ScaledMatrix(" + repr(self.scalar) + ", " + repr(self.primitive) + ")"
+
+
+class ScaledSemiring(ta.Semiring):
+    """
+    R_max-times or R_min-times on ScaledMatrix. Operations return scaled matrices normalized by the gcd of
+    their entries, and ordinary matrices given as arguments are normalized first.
+    """
+
+    def __init__(self, base):
+        super().__init__(base.name, base.sum_elements, base.mul_elements, base.zero_element, base.one_element)
+        self.base = base
+
+    def __repr__(self):
+        return "ScaledSemiring(" + self.name + ")"
+
+    def scaled(self, A):
+        """
+        Returns A as a ScaledMatrix.
+        """
+        if isinstance(A, ScaledMatrix):
+            return A
+        return ScaledMatrix.normalize(A)
+
+    def zero_matrix(self, n):
+        return self.scaled(super().zero_matrix(n))
+
+    def one_matrix(self, n):
+        return self.scaled(super().one_matrix(n))
+
+    def _sum_matrices(self, A, B):
+        A = self.scaled(A)
+        B = self.scaled(B)
+        g = math.gcd(A.scalar, B.scalar)
+        C = self.base._sum_matrices(_scale(A.primitive, A.scalar // g), _scale(B.primitive, B.scalar // g))
+        return ScaledMatrix.normalize(C, g)
+
+    def _mul_matrices(self, A, B):
+        A = self.scaled(A)
+        B = self.scaled(B)
+        return ScaledMatrix.normalize(self.base._mul_matrices(A.primitive, B.primitive), A.scalar * B.scalar)
+
+    def _mul_matrix_by_coef(self, A, coef):
+        A = self.scaled(A)
+        if coef != ta.INFTY and coef > 0:
+            return ScaledMatrix(A.scalar * coef, A.primitive)
+        # Multiplication by 0 or infty doesn't depend on the scalar.
+        return ScaledMatrix.normalize(self.base._mul_matrix_by_coef(A.primitive, coef))
+
+    def _add_scaled_matrix(self, C, D, coef):
+        return self._sum_matrices(C, self._mul_matrix_by_coef(D, coef))
+
+
+MAX_TIMES = ScaledSemiring(ta.MAX_TIMES)
+"""R_max-times on scaled matrices."""
+
+MIN_TIMES = ScaledSemiring(ta.MIN_TIMES)
+"""R_min-times on scaled matrices."""
@@ -0,0 +1,61 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import random
+import unittest
+import matrix_utils
+import tropical_algebra as ta
+import tropical_scaled as tsc
+
+
+def generate_matrix(n, factor, semiring, zero_rate=0.0):
+    zero = semiring.zero_element()
+    return [[zero if random.random() < zero_rate else factor * random.randint(1, 30) for _ in range(n)]
+            for _ in range(n)]
+
+
+class TestTropicalScaled(unittest.TestCase):
+    def test_normalize(self):
+        A = tsc.ScaledMatrix.normalize([[6, ta.INFTY], [0, 9]], 2)
+        self.assertEqual(A.scalar, 6)
+        self.assertEqual(A.primitive, [[2, ta.INFTY], [0, 3]])
+        self.assertEqual(A, [[12, ta.INFTY], [0, 18]])
+        self.assertEqual(A[1], (0, 18))
+        self.assertEqual(tsc.ScaledMatrix.normalize([[0, ta.INFTY]]).scalar, 1)
+        self.assertEqual(matrix_utils.projective_fingerprint(A),
+                         matrix_utils.projective_fingerprint([[2, ta.INFTY], [0, 3]]))
+
+    def test_operations(self):
+        random.seed(21)
+        for _ in range(100):
+            base, semiring = random.choice([(ta.MAX_TIMES, tsc.MAX_TIMES), (ta.MIN_TIMES, tsc.MIN_TIMES)])
+            n = random.randint(1, 5)
+            A = generate_matrix(n, random.choice([1, 6, 2 ** 40]), base, 0.2)
+            B = generate_matrix(n, random.choice([1, 10]), base, 0.2)
+            SA = semiring.scaled(A)
+            SB = semiring.scaled(B)
+            coef = random.choice([0, 4, ta.INFTY])
+            self.assertEqual(semiring.mul_matrices(SA, SB), base.mul_matrices(A, B))
+            self.assertEqual(semiring.sum_matrices(SA, B), base.sum_matrices(A, B))
+            self.assertEqual(semiring.mul_matrix_by_coef(SA, coef), base.mul_matrix_by_coef(A, coef))
+            self.assertEqual(semiring.add_scaled_matrix(SA, SB, coef),
+                             base.add_scaled_matrix([r[:] for r in A], B, coef))
+            self.assertEqual(semiring.pwr_matrix(SA, 7), base.pwr_matrix(A, 7))
+            self.assertEqual(semiring.calc_poly_matrix(SA, [3, 0, 1]), base.calc_poly_matrix(A, [3, 0, 1]))
+
+    def test_powers_are_reduced(self):
+        random.seed(21)
+        M = generate_matrix(4, 1, ta.MAX_TIMES)
+        P = tsc.MAX_TIMES.pwr_matrix(M, 50)
+        self.assertEqual(P, ta.pwr_matrix_max_times(M, 50))
+        self.assertLess(max(map(max, P.primitive)), P.scalar)
+
+
+if __name__ == "__main__":
+    unittest.main()
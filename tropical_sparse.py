@@ -0,0 +1,201 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import operator
+import tropical_algebra as ta
+
+DENSITY = 0.1
+"""Products of sparse matrices with the product of densities above this bound are computed by the dense kernel."""
+
+DENSE_RESULT = 0.5
+"""Products computed by the sparse kernel with a larger density are returned as dense matrices."""
+
+
+class SparseMatrix:
+    """
+    A square matrix over a semiring which stores only the entries different from the zero of the semiring:
+    rows[i] is a dict {j: A[i][j]}. Indexing and iteration give dense rows as tuples,
+    so the functions for dense matrices (calc_min, comparisons and so on) accept sparse matrices as well.
+    """
+
+    __hash__ = None
+
+    def __init__(self, n, zero, rows=None):
+        self.n = n
+        self.zero = zero
+        self.rows = rows if rows is not None else [{} for _ in range(n)]
+
+    @classmethod
+    def from_dense(cls, A, zero):
+        """
+        Returns the sparse matrix with the same entries as a dense matrix A, zero is the zero of the semiring.
+        """
+        return cls(len(A), zero, [{j: a for j, a in enumerate(row) if a != zero} for row in A])
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        row = self.rows[i]
+        return tuple(row.get(j, self.zero) for j in range(self.n))
+
+    def __iter__(self):
+        for i in range(self.n):
+            yield self[i]
+
+    def tolist(self):
+        """
+        Returns the matrix as a list of lists.
+        """
+        return [list(row) for row in self]
+
+    def nnz(self):
+        """
+        Returns the number of stored (non-zero) entries.
+        """
+        return sum(map(len, self.rows))
+
+    def density(self):
+        """
+        Returns the fraction of non-zero entries.
+        """
+        return self.nnz() / self.n ** 2 if self.n else 0.0
+
+    def __eq__(self, other):
+        if isinstance(other, SparseMatrix):
+            return self.n == other.n and self.zero == other.zero and self.rows == other.rows
+        try:
+            return self.tolist() == [list(row) for row in other]
+        except TypeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __repr__(self):
+        return "SparseMatrix(" + repr(self.tolist()) + ")"
+
+
+def _dense(A):
+    if isinstance(A, SparseMatrix):
+        return A.tolist()
+    return A
+
+
+def _has_infty(A):
+    return any(ta.INFTY in row.values() for row in A.rows)
+
+
+class SparseSemiring(ta.Semiring):
+    """
+    R_max-times or R_min-times where zero and unit matrices are sparse, and operations on sparse matrices
+    skip the zeros of the semiring. A product with a sparse operand is computed by the sparse kernel if
+    the product of the densities of the operands is at most density, and by the dense kernel of the base
+    semiring otherwise. Operations on dense matrices are the ones of the base semiring.
+    """
+
+    def __init__(self, base, density=DENSITY):
+        super().__init__(base.name, base.sum_elements, base.mul_elements, base.zero_element, base.one_element)
+        self.base = base
+        self.density = density
+        # Sums of finite non-zero entries are max or min of them.
+        self._sum_finite = max if base is ta.MAX_TIMES else min
+
+    def __repr__(self):
+        return "SparseSemiring(" + self.name + ")"
+
+    def sparse(self, A):
+        """
+        Returns A as a sparse matrix over the semiring.
+        """
+        if isinstance(A, SparseMatrix):
+            return A
+        return SparseMatrix.from_dense(A, self.zero_element())
+
+    def zero_matrix(self, n):
+        return self.sparse(super().zero_matrix(n))
+
+    def one_matrix(self, n):
+        return self.sparse(super().one_matrix(n))
+
+    def _sum_matrices(self, A, B):
+        if not isinstance(A, SparseMatrix) or not isinstance(B, SparseMatrix):
+            return self.base._sum_matrices(_dense(A), _dense(B))
+        C = SparseMatrix(A.n, A.zero, [dict(row) for row in A.rows])
+        return self._add_scaled_matrix(C, B, self.one_element())
+
+    def _mul_matrices(self, A, B):
+        if not isinstance(A, SparseMatrix) and not isinstance(B, SparseMatrix):
+            return self.base._mul_matrices(A, B)
+        A = self.sparse(A)
+        B = self.sparse(B)
+        if A.density() * B.density() > self.density:
+            return self.base._mul_matrices(A.tolist(), B.tolist())
+
+        zero = self.zero_element()
+        if _has_infty(A) or _has_infty(B):
+            mul = self.mul_elements
+            add = self.sum_elements
+        else:
+            mul = operator.mul
+            add = self._sum_finite
+        rows = []
+        for row in A.rows:
+            acc = {}
+            for k, a in row.items():
+                for j, b in B.rows[k].items():
+                    c = mul(a, b)
+                    acc[j] = add(acc[j], c) if j in acc else c
+            rows.append({j: c for j, c in acc.items() if c != zero})
+        C = SparseMatrix(A.n, zero, rows)
+        if C.density() > DENSE_RESULT:
+            return C.tolist()
+        return C
+
+    def _mul_matrix_by_coef(self, A, coef):
+        if not isinstance(A, SparseMatrix):
+            return self.base._mul_matrix_by_coef(A, coef)
+        zero = self.zero_element()
+        rows = []
+        for row in A.rows:
+            scaled = {j: self.mul_elements(a, coef) for j, a in row.items()}
+            rows.append({j: c for j, c in scaled.items() if c != zero})
+        return SparseMatrix(A.n, zero, rows)
+
+    def _add_scaled_matrix(self, C, D, coef):
+        if not isinstance(D, SparseMatrix):
+            return self.base._add_scaled_matrix(_dense(C), D, coef)
+        zero = self.zero_element()
+        if coef == zero:
+            return C
+        if isinstance(C, SparseMatrix):
+            for c, d in zip(C.rows, D.rows):
+                for j, a in d.items():
+                    x = self.mul_elements(a, coef)
+                    x = self.sum_elements(c[j], x) if j in c else x
+                    if x == zero:
+                        c.pop(j, None)
+                    else:
+                        c[j] = x
+            return C
+        # Only the non-zero entries of D change a dense C.
+        for c, d in zip(C, D.rows):
+            for j, a in d.items():
+                c[j] = self.sum_elements(c[j], self.mul_elements(a, coef))
+        return C
+
+
+MAX_TIMES = SparseSemiring(ta.MAX_TIMES)
+"""R_max-times with sparse zero and unit matrices."""
+
+MIN_TIMES = SparseSemiring(ta.MIN_TIMES)
+"""R_min-times with sparse zero and unit matrices."""
@@ -0,0 +1,67 @@
+"""
+An attack on a key exchange protocol based on max-times and min-times
+algebras from [M. I. Durcheva, An application of different dioids in public
+key cryptography. In AIP Conference Proceedings, vol. 1631, pp. 336-343,
+AIP, 2014].
+
+I. Buchinskiy, M. Kotov, A. Treier, 2022
+"""
+
+import random
+import unittest
+import tropical_algebra as ta
+import tropical_sparse as ts
+
+
+def generate_matrix(n, density, semiring, infty_rate=0.0):
+    zero = semiring.zero_element()
+    return [[(ta.INFTY if random.random() < infty_rate else random.randint(1, 100))
+             if random.random() < density else zero for _ in range(n)] for _ in range(n)]
+
+
+class TestTropicalSparse(unittest.TestCase):
+    def test_sparse_matrix(self):
+        A = ts.MIN_TIMES.sparse([[1, ta.INFTY], [ta.INFTY, ta.INFTY]])
+        self.assertEqual(A.rows, [{0: 1}, {}])
+        self.assertEqual(A.nnz(), 1)
+        self.assertEqual(A.density(), 0.25)
+        self.assertEqual(A[1], (ta.INFTY, ta.INFTY))
+        self.assertEqual(A, [[1, ta.INFTY], [ta.INFTY, ta.INFTY]])
+        self.assertNotEqual(A, [[1, ta.INFTY], [ta.INFTY, 2]])
+        self.assertEqual(ts.MAX_TIMES.one_matrix(3).nnz(), 3)
+        self.assertEqual(ts.MIN_TIMES.zero_matrix(3).nnz(), 0)
+
+    def test_operations(self):
+        random.seed(19)
+        for _ in range(200):
+            base, semiring = random.choice([(ta.MAX_TIMES, ts.MAX_TIMES), (ta.MIN_TIMES, ts.MIN_TIMES)])
+            infty_rate = 0.2 if base is ta.MAX_TIMES else 0.0
+            n = random.randint(1, 12)
+            A = generate_matrix(n, random.random(), base, infty_rate)
+            B = generate_matrix(n, random.random(), base, infty_rate)
+            SA = semiring.sparse(A)
+            SB = semiring.sparse(B)
+            coef = random.choice([0, 3, ta.INFTY])
+            p = [random.randint(1, 5)] + [random.choice([0, 1, 5, ta.INFTY]) for _ in range(random.randint(0, 5))]
+
+            self.assertEqual(semiring.mul_matrices(SA, SB), base.mul_matrices(A, B))
+            self.assertEqual(semiring.mul_matrices(A, SB), base.mul_matrices(A, B))
+            self.assertEqual(semiring.sum_matrices(SA, SB), base.sum_matrices(A, B))
+            self.assertEqual(semiring.mul_matrix_by_coef(SA, coef), base.mul_matrix_by_coef(A, coef))
+            self.assertEqual(semiring.add_scaled_matrix(semiring.sparse([row[:] for row in A]), SB, coef),
+                             base.add_scaled_matrix([row[:] for row in A], B, coef))
+            self.assertEqual(semiring.add_scaled_matrix([row[:] for row in A], SB, coef),
+                             base.add_scaled_matrix([row[:] for row in A], B, coef))
+            self.assertEqual(semiring.pwr_matrix(SA, 4), base.pwr_matrix(A, 4))
+            self.assertEqual(semiring.calc_poly_matrix(A, p), base.calc_poly_matrix(A, p))
+
+    def test_kernel_choice(self):
+        random.seed(19)
+        A = ts.MAX_TIMES.sparse(generate_matrix(30, 0.05, ta.MAX_TIMES))
+        self.assertIsInstance(ts.MAX_TIMES.mul_matrices(A, A), ts.SparseMatrix)
+        B = ts.MAX_TIMES.sparse(generate_matrix(30, 0.9, ta.MAX_TIMES))
+        self.assertNotIsInstance(ts.MAX_TIMES.mul_matrices(B, B), ts.SparseMatrix)
+
+
+if __name__ == "__main__":
+    unittest.main()